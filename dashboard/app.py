@@ -2,24 +2,35 @@ from __future__ import annotations
 
 import io
 from pathlib import Path
-from typing import Any, Dict, Tuple
+from typing import Any, Dict, List, Optional, Tuple
 
+import altair as alt
 import pandas as pd
 import streamlit as st
-import matplotlib.pyplot as plt
 
-from dashboard.utils import file_fingerprint, parse_events_jsonl_bytes, compute_kpis, compute_unit_fty
-from mtap.analytics.pareto import pareto_failures
+from dashboard.utils import load_events_cached, compute_kpis, compute_unit_fty, final_attempt_frame
+from mtap.analytics.pareto import pareto_failures_df
 
 
 st.set_page_config(page_title="MTAP Dashboard", layout="wide")
 
+# Cache key for everything derived from the filtered frame:
+# (file fingerprint, max_rows, stage, fw, batch, station). Frames themselves are
+# passed as underscore-prefixed args, which st.cache_data does not hash.
+ViewKey = Tuple[str, int, str, str, str, str]
+
+
+FILTER_COLS = ("stage", "fw_version", "batch_id", "station_id")
+
 
 @st.cache_data(show_spinner=False)
-def _load_df(data: bytes, max_rows: int) -> Tuple[pd.DataFrame, str]:
-    fp = file_fingerprint(data)
-    df = parse_events_jsonl_bytes(data, max_rows=max_rows)
-    return df, fp
+def _load_df(data: bytes, max_rows: int) -> Tuple[pd.DataFrame, str, Dict[str, List[str]]]:
+    df, fp = load_events_cached(data, max_rows=max_rows)
+    # Sidebar option lists, computed once per upload: category columns already hold their uniques
+    options = {
+        c: ["ALL"] + sorted(x for x in df[c].cat.categories.tolist() if str(x)) for c in FILTER_COLS
+    }
+    return df, fp, options
 
 
 def _apply_filters(df: pd.DataFrame, *, stage: str, fw: str, batch: str, station: str) -> pd.DataFrame:
@@ -35,8 +46,41 @@ def _apply_filters(df: pd.DataFrame, *, stage: str, fw: str, batch: str, station
     return out
 
 
-def _kpi_cards(df: pd.DataFrame) -> None:
-    k = compute_kpis(df)
+@st.cache_data(show_spinner=False)
+def _cached_filter(key: ViewKey, _df: pd.DataFrame) -> pd.DataFrame:
+    _, _, stage, fw, batch, station = key
+    return _apply_filters(_df, stage=stage, fw=fw, batch=batch, station=station)
+
+
+@st.cache_data(show_spinner=False)
+def _cached_final_attempts(key: ViewKey, _dff: pd.DataFrame) -> pd.DataFrame:
+    return final_attempt_frame(_dff)
+
+
+@st.cache_data(show_spinner=False)
+def _cached_kpis(key: ViewKey, _dff: pd.DataFrame) -> Dict[str, Any]:
+    return compute_kpis(_dff, final=_cached_final_attempts(key, _dff))
+
+
+@st.cache_data(show_spinner=False)
+def _cached_unit_fty(key: ViewKey, _dff: pd.DataFrame) -> pd.Series:
+    return compute_unit_fty(_dff, final=_cached_final_attempts(key, _dff))
+
+
+@st.cache_data(show_spinner=False)
+def _cached_pareto(key: ViewKey, _fails: pd.DataFrame) -> Dict[str, Dict[str, int]]:
+    return pareto_failures_df(_fails)
+
+
+@st.cache_data(show_spinner=False)
+def _cached_heatmap(
+    key: ViewKey, mode: str, _dff: pd.DataFrame, _fails: pd.DataFrame
+) -> Tuple[Optional[pd.DataFrame], str]:
+    return _heatmap_pivot(_dff, _fails, mode)
+
+
+def _kpi_cards(df: pd.DataFrame, key: ViewKey) -> None:
+    k = _cached_kpis(key, df)
     c1, c2, c3, c4 = st.columns(4)
     c1.metric("Units", f"{k['units']}")
     c2.metric("FPY", f"{k['fpy']*100:.1f}%")
@@ -44,15 +88,24 @@ def _kpi_cards(df: pd.DataFrame) -> None:
     c4.metric("Flaky rate", f"{k['flaky_rate']*100:.1f}%")
 
 
-def _pareto_section(df: pd.DataFrame) -> None:
+def _pareto_bars(items: List[Tuple[str, int]], *, x_title: str) -> None:
+    # Vega-Lite renders client-side; keep the pareto (count desc) order on the x axis
+    src = pd.DataFrame(items, columns=["label", "fails"])
+    chart = alt.Chart(src).mark_bar().encode(
+        x=alt.X("label:N", sort=None, title=x_title, axis=alt.Axis(labelAngle=-45)),
+        y=alt.Y("fails:Q", title="failed attempts"),
+        tooltip=["label", "fails"],
+    )
+    st.altair_chart(chart, use_container_width=True)
+
+
+def _pareto_section(df: pd.DataFrame, fails: pd.DataFrame, key: ViewKey) -> None:
     st.subheader("Pareto")
     if df.empty:
         st.info("No data after filters.")
         return
 
-    # Convert filtered df to events list for pareto computation
-    events = df.to_dict(orient="records")
-    counts = pareto_failures(events)
+    counts = _cached_pareto(key, fails)
 
     col1, col2 = st.columns(2)
     with col1:
@@ -61,14 +114,7 @@ def _pareto_section(df: pd.DataFrame) -> None:
         if not items:
             st.write("—")
         else:
-            labels = [k for k, _ in items]
-            values = [v for _, v in items]
-            plt.figure()
-            plt.bar(labels, values)
-            plt.xticks(rotation=45, ha="right")
-            plt.tight_layout()
-            st.pyplot(plt.gcf())
-            plt.close()
+            _pareto_bars(items, x_title="test_step")
 
     with col2:
         st.caption("Top error codes (failed attempts)")
@@ -76,56 +122,68 @@ def _pareto_section(df: pd.DataFrame) -> None:
         if not items:
             st.write("—")
         else:
-            labels = [k for k, _ in items]
-            values = [v for _, v in items]
-            plt.figure()
-            plt.bar(labels, values)
-            plt.xticks(rotation=45, ha="right")
-            plt.tight_layout()
-            st.pyplot(plt.gcf())
-            plt.close()
+            _pareto_bars(items, x_title="error_code")
 
 
-def _heatmap_section(df: pd.DataFrame) -> None:
-    st.subheader("Failure heatmap")
-    if df.empty:
-        st.info("No data after filters.")
-        return
+def _heatmap_pivot(
+    df: pd.DataFrame, fails: pd.DataFrame, mode: str
+) -> Tuple[Optional[pd.DataFrame], str]:
+    """Failed-attempt counts pivot (test_step x batch/temp bin).
 
-    mode = st.radio("Heatmap type", ["Step vs Batch", "Step vs Temp bin"], horizontal=True)
-
-    fails = df[df["passed"] == False].copy()
+    `fails` is the failed-attempt rows of `df`.
+    Returns (pivot, "") or (None, reason) when the heatmap cannot be drawn.
+    """
     if fails.empty:
-        st.success("No failures in filtered data.")
-        return
+        return None, "no_failures"
 
     if mode == "Step vs Batch":
         x_field = "batch_id"
-        fails[x_field] = fails[x_field].fillna("UNKNOWN")
+        fails = fails.assign(batch_id=fails["batch_id"].astype(object).fillna("UNKNOWN"))
     else:
         x_field = "temp_bin"
         # derive temp_bin by SN: use last known temp_bin per SN (from temp measurements)
-        temp_meas = df[df["measurement"] == "temp_c"].copy()
+        temp_meas = df[df["measurement"] == "temp_c"]
         if temp_meas.empty:
-            st.warning("No temp measurements found; temp-bin heatmap unavailable.")
-            return
-        last_temp = temp_meas.sort_values(["sn", "timestamp"]).groupby("sn").tail(1)[["sn", "temp_bin"]]
+            return None, "no_temps"
+        last_temp = temp_meas.sort_values(["sn", "ts_ns"]).groupby("sn", observed=True).tail(1)
+        last_temp = last_temp[["sn", "temp_bin"]]
         fails = fails.merge(last_temp, on="sn", how="left", suffixes=("", "_sn"))
-        fails["temp_bin"] = fails["temp_bin_sn"].fillna("UNKNOWN")
+        fails["temp_bin"] = fails["temp_bin_sn"].astype(object).fillna("UNKNOWN")
         fails.drop(columns=["temp_bin_sn"], inplace=True)
-        fails[x_field] = fails[x_field].fillna("UNKNOWN")
 
-    # Pivot counts
-    pivot = fails.pivot_table(index="test_step", columns=x_field, values="sn", aggfunc="count", fill_value=0)
+    # Pivot counts: groupby-count + unstack (same table as pivot_table(aggfunc="count"), ~2x faster)
+    pivot = fails.groupby(["test_step", x_field], observed=True)["sn"].count().unstack(fill_value=0)
+    return pivot, ""
 
-    plt.figure()
-    plt.imshow(pivot.values, aspect="auto")
-    plt.yticks(range(len(pivot.index)), pivot.index)
-    plt.xticks(range(len(pivot.columns)), pivot.columns, rotation=45, ha="right")
-    plt.title(f"Failures count: test_step vs {x_field}")
-    plt.tight_layout()
-    st.pyplot(plt.gcf())
-    plt.close()
+
+def _heatmap_section(df: pd.DataFrame, fails: pd.DataFrame, key: ViewKey) -> None:
+    st.subheader("Failure heatmap")
+    if df.empty:
+        st.info("No data after filters.")
+        return
+
+    mode = st.radio("Heatmap type", ["Step vs Batch", "Step vs Temp bin"], horizontal=True)
+
+    pivot, reason = _cached_heatmap(key, mode, df, fails)
+    if reason == "no_failures":
+        st.success("No failures in filtered data.")
+        return
+    if reason == "no_temps":
+        st.warning("No temp measurements found; temp-bin heatmap unavailable.")
+        return
+    x_field = pivot.columns.name
+
+    cells = pivot.stack().rename("fails").reset_index()
+    cells[x_field] = cells[x_field].astype(str)
+    chart = alt.Chart(cells, title=f"Failures count: test_step vs {x_field}").mark_rect().encode(
+        x=alt.X(
+            f"{x_field}:N", sort=[str(c) for c in pivot.columns], axis=alt.Axis(labelAngle=-45)
+        ),
+        y=alt.Y("test_step:N", sort=list(pivot.index)),
+        color=alt.Color("fails:Q"),
+        tooltip=["test_step", x_field, "fails"],
+    )
+    st.altair_chart(chart, use_container_width=True)
 
     st.caption("Values = failed attempts count (after filters).")
     st.dataframe(pivot)
@@ -144,10 +202,11 @@ def _sn_history_section(df: pd.DataFrame) -> None:
     sn = st.selectbox("Select SN", sns)
 
     d = df[df["sn"] == sn].copy()
-    d = d.sort_values(["timestamp", "test_step", "attempt"])
+    d = d.sort_values(["ts_ns", "test_step", "attempt"])
 
     # Show per-step outcomes (final attempt)
-    last = d.sort_values(["test_step", "attempt"]).groupby("test_step").tail(1)[["test_step","passed","error_code","attempt","duration_ms"]]
+    last = d.sort_values(["test_step", "attempt"]).groupby("test_step", observed=True).tail(1)
+    last = last[["test_step", "passed", "error_code", "attempt", "duration_ms"]]
     st.caption("Final outcome per step (latest attempt)")
     st.dataframe(last.reset_index(drop=True))
 
@@ -158,15 +217,20 @@ def _sn_history_section(df: pd.DataFrame) -> None:
         return
 
     d["pass_int"] = d["passed"].astype(int)
-    plt.figure()
-    plt.plot(d["timestamp"], d["pass_int"], marker="o")
-    plt.yticks([0,1], ["FAIL","PASS"])
-    plt.xlabel("time (UTC)")
-    plt.ylabel("result")
-    plt.title(f"{sn} attempt outcomes over time")
-    plt.tight_layout()
-    st.pyplot(plt.gcf())
-    plt.close()
+    chart = alt.Chart(
+        d[["timestamp", "pass_int", "test_step", "attempt"]],
+        title=f"{sn} attempt outcomes over time",
+    ).mark_line(point=True).encode(
+        x=alt.X("timestamp:T", title="time (UTC)"),
+        y=alt.Y(
+            "pass_int:Q",
+            title="result",
+            scale=alt.Scale(domain=[0, 1]),
+            axis=alt.Axis(values=[0, 1], labelExpr="datum.value == 1 ? 'PASS' : 'FAIL'"),
+        ),
+        tooltip=["timestamp", "test_step", "attempt"],
+    )
+    st.altair_chart(chart, use_container_width=True)
 
     st.caption("Raw events for SN")
     st.dataframe(d[["timestamp","test_step","command","attempt","passed","error_code","duration_ms","measurement","value"]])
@@ -184,40 +248,38 @@ def main() -> None:
         return
 
     data = uploaded.getvalue()
-    df, fp = _load_df(data, int(max_rows))
+    df, fp, options = _load_df(data, int(max_rows))
 
     st.sidebar.header("Filters")
-    stages = ["ALL"] + sorted([x for x in df["stage"].dropna().unique().tolist() if str(x)])
-    fws = ["ALL"] + sorted([x for x in df["fw_version"].dropna().unique().tolist() if str(x)])
-    batches = ["ALL"] + sorted([x for x in df["batch_id"].dropna().unique().tolist() if str(x)])
-    stations = ["ALL"] + sorted([x for x in df["station_id"].dropna().unique().tolist() if str(x)])
-
-    stage = st.sidebar.selectbox("Stage", stages)
-    fw = st.sidebar.selectbox("FW", fws)
-    batch = st.sidebar.selectbox("Batch", batches)
-    station = st.sidebar.selectbox("Station", stations)
+    stage = st.sidebar.selectbox("Stage", options["stage"])
+    fw = st.sidebar.selectbox("FW", options["fw_version"])
+    batch = st.sidebar.selectbox("Batch", options["batch_id"])
+    station = st.sidebar.selectbox("Station", options["station_id"])
 
-    dff = _apply_filters(df, stage=stage, fw=fw, batch=batch, station=station)
+    key: ViewKey = (fp, int(max_rows), stage, fw, batch, station)
+    dff = _cached_filter(key, df)
+    # failed-attempt rows, shared by the pareto and heatmap sections
+    fails = dff[~dff["passed"].to_numpy(dtype=bool)]
 
     st.caption(f"Loaded {len(df):,} events (fingerprint {fp}). Showing {len(dff):,} after filters.")
-    _kpi_cards(dff)
+    _kpi_cards(dff, key)
 
     tabs = st.tabs(["Overview", "Pareto", "Heatmap", "SN History", "Raw"])
     with tabs[0]:
         st.subheader("Overview")
-        unit_final = compute_unit_fty(dff)
+        unit_final = _cached_unit_fty(key, dff)
         if not unit_final.empty:
             st.write("Final unit outcome (FTY) per SN")
             st.dataframe(unit_final.rename("final_passed").reset_index().rename(columns={"index":"sn"}))
     with tabs[1]:
-        _pareto_section(dff)
+        _pareto_section(dff, fails, key)
     with tabs[2]:
-        _heatmap_section(dff)
+        _heatmap_section(dff, fails, key)
     with tabs[3]:
         _sn_history_section(dff)
     with tabs[4]:
         st.subheader("Raw events")
-        st.dataframe(dff)
+        st.dataframe(dff, column_config={"ts_ns": None})
 
 if __name__ == "__main__":
     main()
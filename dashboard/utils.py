@@ -3,8 +3,11 @@ from __future__ import annotations
 import hashlib
 import io
 import json
+import os
+from pathlib import Path
 from typing import Any, Dict, Iterable, List, Optional, Tuple
 
+import numpy as np
 import pandas as pd
 
 
@@ -14,6 +17,18 @@ REQUIRED_COLS = [
     "duration_ms", "measurement", "value",
 ]
 
+# Low-cardinality string columns stored as category (int codes + shared uniques).
+# Filtered views keep all categories, so groupbys on these must use observed=True.
+# (temp_bin is built as a categorical directly.)
+CATEGORY_COLS = (
+    "sn", "batch_id", "station_id", "stage", "fw_version",
+    "test_step", "command", "error_code", "measurement",
+)
+
+# temp_bin bins: <20, 20-30, 30-40, >=40 (right-closed edges, as pd.cut produced)
+TEMP_BIN_EDGES = np.array([20.0, 30.0, 40.0])
+TEMP_BIN_LABELS = ["<20C", "20-30C", "30-40C", ">=40C"]
+
 
 def file_fingerprint(data: bytes) -> str:
     h = hashlib.sha256()
@@ -21,13 +36,8 @@ def file_fingerprint(data: bytes) -> str:
     return h.hexdigest()[:16]
 
 
-def parse_events_jsonl_bytes(data: bytes, *, max_rows: Optional[int] = None) -> pd.DataFrame:
-    """Parse MTAP JSONL event log bytes into a DataFrame.
-
-    Designed for Streamlit upload use:
-    - Line-by-line parsing (streaming friendly)
-    - Keeps only stable columns needed for analytics/triage
-    """
+def _parse_lines_tolerant(data: bytes, *, max_rows: Optional[int] = None) -> pd.DataFrame:
+    """Slow-path parser: one json.loads per line, skipping malformed lines."""
     rows: List[Dict[str, Any]] = []
     bio = io.BytesIO(data)
     i = 0
@@ -52,60 +62,151 @@ def parse_events_jsonl_bytes(data: bytes, *, max_rows: Optional[int] = None) ->
         if max_rows is not None and i >= max_rows:
             break
 
-    df = pd.DataFrame(rows)
+    return pd.DataFrame(rows, columns=REQUIRED_COLS + ["retry_reason", "will_retry"])
+
+
+def parse_events_jsonl_bytes(data: bytes, *, max_rows: Optional[int] = None) -> pd.DataFrame:
+    """Parse MTAP JSONL event log bytes into a DataFrame.
+
+    Designed for Streamlit upload use:
+    - Whole-buffer parse: lines are joined into one JSON array and decoded in a
+      single C call (no per-line interpreter round-trip)
+    - Falls back to tolerant line-by-line parsing if any line is malformed
+    - Keeps only stable columns needed for analytics/triage
+    """
+    lines = [ln for ln in data.splitlines() if ln.strip()]
+    if max_rows is not None:
+        lines = lines[:max_rows]
+    try:
+        events = json.loads(b"[" + b",\n".join(lines) + b"]")
+    except ValueError:
+        df = _parse_lines_tolerant(data, max_rows=max_rows)
+    else:
+        df = pd.DataFrame.from_records(events, columns=REQUIRED_COLS)
+        # Nested debug payload
+        nested = [ev.get("data") or {} for ev in events]
+        df["retry_reason"] = [d.get("retry_reason") for d in nested]
+        df["will_retry"] = [d.get("will_retry") for d in nested]
 
     # Normalize types
     if "timestamp" in df.columns:
         df["timestamp"] = pd.to_datetime(df["timestamp"], errors="coerce", utc=True)
+        # int64 ns sort key (sorting ints beats tz-aware datetimes); NaT -> int64 max so
+        # it still sorts last, as sort_values does with NaT
+        ts = df["timestamp"].array
+        df["ts_ns"] = np.where(ts.isna(), np.iinfo(np.int64).max, ts.asi8)
     for c in ["attempt", "duration_ms"]:
         if c in df.columns:
-            df[c] = pd.to_numeric(df[c], errors="coerce").fillna(0).astype(int)
+            df[c] = pd.to_numeric(df[c], errors="coerce").fillna(0).astype("int32")
     if "passed" in df.columns:
-        df["passed"] = df["passed"].astype(bool)
+        # NaN (missing key) must read as a failure, not truthy
+        df["passed"] = df["passed"].eq(True)
 
-    # temp_bin derived from temp measurements (pass-only by default later)
-    df["temp_bin"] = None
-    m = df["measurement"] == "temp_c"
+    # temp_bin derived from temp measurements (pass-only by default later):
+    # int8 codes straight into a categorical, -1 (null) for non-temp rows / non-numeric values
+    codes = np.full(len(df), -1, dtype=np.int8)
+    m = (df["measurement"] == "temp_c").to_numpy()
     if m.any():
-        vals = pd.to_numeric(df.loc[m, "value"], errors="coerce")
-        bins = pd.cut(vals, bins=[-1e9, 20, 30, 40, 1e9], labels=["<20C", "20-30C", "30-40C", ">=40C"])
-        df.loc[m, "temp_bin"] = bins.astype(str)
+        vals = pd.to_numeric(df["value"][m], errors="coerce")
+        vals = vals.to_numpy(dtype="float64", na_value=np.nan)
+        # side="left": bins are right-closed, i.e. 20.0 -> "<20C"
+        idx = np.searchsorted(TEMP_BIN_EDGES, vals, side="left").astype(np.int8)
+        codes[m] = np.where(np.isnan(vals), -1, idx)
+    df["temp_bin"] = pd.Categorical.from_codes(codes, categories=TEMP_BIN_LABELS)
+
+    for c in CATEGORY_COLS:
+        df[c] = df[c].astype("category")
 
     return df
 
 
-def compute_unit_fty(df: pd.DataFrame) -> pd.Series:
+# Parsed-frame disk cache. Bump PARSE_CACHE_VERSION whenever the output of
+# parse_events_jsonl_bytes changes so stale files are not served.
+PARSE_CACHE_VERSION = 4
+PARSE_CACHE_DIR = Path.home() / ".cache" / "mtap" / "parsed"
+
+
+def _encode_value(v: Any) -> Optional[str]:
+    return None if v is None else json.dumps(v)
+
+
+def _decode_value(v: Optional[str]) -> Any:
+    return None if v is None else json.loads(v)
+
+
+def load_events_cached(data: bytes, *, max_rows: Optional[int] = None) -> Tuple[pd.DataFrame, str]:
+    """Parse uploaded bytes, reusing a parquet copy under ~/.cache/mtap/parsed if present.
+
+    The fingerprint is a content hash, so no mtime/size validation is needed.
+    Cache read/write failures fall back to parsing.
+    """
+    fp = file_fingerprint(data)
+    path = PARSE_CACHE_DIR / f"{fp}_{max_rows}_v{PARSE_CACHE_VERSION}.parquet"
+
+    try:
+        df = pd.read_parquet(path)
+        # value is mixed float/bool/None (limits may use `equals: true`); stored as JSON text
+        df["value"] = df["value"].map(_decode_value)
+        return df, fp
+    except Exception:
+        pass
+
+    df = parse_events_jsonl_bytes(data, max_rows=max_rows)
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(f".{os.getpid()}.tmp")
+        encoded = df.assign(value=df["value"].map(_encode_value))
+        encoded.to_parquet(tmp, compression="zstd", index=False)
+        os.replace(tmp, path)
+    except Exception:
+        # cache is best-effort (read-only home, pyarrow missing, ...)
+        pass
+    return df, fp
+
+
+def final_attempt_frame(df: pd.DataFrame) -> pd.DataFrame:
+    """Final attempt per (SN, step) with an any_fail flag for the step instance.
+
+    Shared by compute_unit_fty and compute_kpis so the sort/dedup runs once.
+    Columns: sn, test_step, attempt, passed, any_fail.
+    """
+    d = df[["sn", "test_step", "attempt", "passed"]]
+    d = d[d["sn"].notna() & d["test_step"].notna()]
+    # stable sort on attempt alone: last row per (sn, step) is the final attempt
+    last = d.sort_values("attempt", kind="stable").drop_duplicates(["sn", "test_step"], keep="last")
+    any_fail = (~d["passed"]).groupby([d["sn"], d["test_step"]], sort=False, observed=True).any()
+    any_fail = any_fail.rename("any_fail")
+    return last.join(any_fail, on=["sn", "test_step"])
+
+
+def compute_unit_fty(df: pd.DataFrame, *, final: Optional[pd.DataFrame] = None) -> pd.Series:
     """Unit final pass per SN based on final attempt per (SN, step)."""
     if df.empty:
         return pd.Series(dtype=bool)
-    # final attempt per sn+step
-    last = df.sort_values(["sn", "test_step", "attempt"]).groupby(["sn", "test_step"]).tail(1)
+    if final is None:
+        final = final_attempt_frame(df)
     # unit pass if all steps final passed
-    unit = last.groupby("sn")["passed"].all()
-    return unit
+    return final.groupby("sn", observed=True)["passed"].all()
 
 
-def compute_kpis(df: pd.DataFrame) -> Dict[str, Any]:
+def compute_kpis(df: pd.DataFrame, *, final: Optional[pd.DataFrame] = None) -> Dict[str, Any]:
     if df.empty:
         return {"units": 0, "fpy": 0.0, "fty": 0.0, "flaky_rate": 0.0}
+    if final is None:
+        final = final_attempt_frame(df)
 
     # FPY: all steps pass on attempt==1 and no fail attempts for that step
-    by = df.sort_values(["sn", "test_step", "attempt"]).groupby(["sn", "test_step"])
-    final = by.tail(1).copy()
-    any_fail = by["passed"].apply(lambda s: (~s).any()).rename("any_fail")
-
-    merged = final.merge(any_fail.reset_index(), on=["sn", "test_step"], how="left")
-    merged["first_pass_ok_step"] = (merged["passed"] == True) & (merged["attempt"] == 1) & (merged["any_fail"] == False)
-
-    unit_first_pass = merged.groupby("sn")["first_pass_ok_step"].all()
-    unit_final = merged.groupby("sn")["passed"].all()
+    first_pass_ok_step = final["passed"] & (final["attempt"] == 1) & ~final["any_fail"]
+    by_sn = final["sn"]
+    unit_first_pass = first_pass_ok_step.groupby(by_sn, observed=True).all()
+    unit_final = final["passed"].groupby(by_sn, observed=True).all()
 
-    units = int(unit_final.shape[0]) if unit_final is not None else 0
+    units = int(unit_final.shape[0])
     fpy = float(unit_first_pass.mean()) if units else 0.0
     fty = float(unit_final.mean()) if units else 0.0
 
     # Flaky: step instance fail->pass
-    merged["flaky_step"] = (merged["any_fail"] == True) & (merged["passed"] == True)
-    flaky_rate = float(merged["flaky_step"].mean()) if merged.shape[0] else 0.0
+    flaky_step = final["any_fail"] & final["passed"]
+    flaky_rate = float(flaky_step.mean()) if final.shape[0] else 0.0
 
     return {"units": units, "fpy": fpy, "fty": fty, "flaky_rate": flaky_rate}
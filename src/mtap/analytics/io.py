@@ -1,31 +1,52 @@
 from __future__ import annotations
 
-import json
 from pathlib import Path
-from typing import Any, Dict, Iterable, List
+from typing import Any, Dict, Iterable, List, Sequence
+
+import pandas as pd
+
+from mtap.common.fastjson import loads
+
+_READ_BUFSIZE = 1 << 20
 
 
 def read_events_jsonl(path: Path) -> List[Dict[str, Any]]:
     """Read MTAP events.jsonl into a list of dicts (append-only replay)."""
-    rows: List[Dict[str, Any]] = []
     if not path.exists():
-        return rows
-    with path.open("r", encoding="utf-8") as f:
-        for line in f:
-            line = line.strip()
-            if not line:
-                continue
-            rows.append(json.loads(line))
-    return rows
+        return []
+    # raw UTF-8 lines go straight to the decoder (no text layer, no strip copy); blank lines skipped
+    with path.open("rb", buffering=_READ_BUFSIZE) as f:
+        return [loads(line) for line in f if not line.isspace()]
 
 
 def iter_events_jsonl(path: Path) -> Iterable[Dict[str, Any]]:
     """Streaming iterator variant."""
     if not path.exists():
         return
-    with path.open("r", encoding="utf-8") as f:
+    with path.open("rb", buffering=_READ_BUFSIZE) as f:
         for line in f:
-            line = line.strip()
-            if not line:
-                continue
-            yield json.loads(line)
+            if not line.isspace():
+                yield loads(line)
+
+
+def events_frame(
+    events: List[Dict[str, Any]],
+    columns: Sequence[str] = ("sn", "test_step", "attempt", "passed"),
+) -> pd.DataFrame:
+    """Columnar view of raw events with the analytics normalizations applied.
+
+    - string fields: keyed by str() like the per-event loops; missing -> "", null -> "None"
+    - attempt: missing/0 -> 1 (same as `int(ev.get("attempt", 1) or 1)`)
+    - passed: missing -> False
+    """
+    df = pd.DataFrame.from_records(events, columns=list(columns))
+    for c in df.columns:
+        if c == "attempt":
+            att = pd.to_numeric(df[c], errors="coerce").fillna(1).astype("int64")
+            df[c] = att.where(att != 0, 1)
+        elif c == "passed":
+            df[c] = df[c].to_numpy(dtype=bool, na_value=False)
+        elif c != "value":
+            # from_records can't tell a null from a missing key, so key off the raw events
+            df[c] = [str(ev.get(c, "")) for ev in events]
+    return df
@@ -2,20 +2,32 @@ from __future__ import annotations
 
 import csv
 from pathlib import Path
-from typing import Any, Dict, List, Tuple
+from typing import Any, Dict, List, Optional, Tuple
 
 import matplotlib
+import numpy as np
+import pandas as pd
 
 # Headless-safe backend for CI/Docker
 matplotlib.use("Agg", force=True)
 
-import matplotlib.pyplot as plt
+from matplotlib.figure import Figure
+
+from mtap.analytics.io import events_frame
 
 
 def _ensure_dir(p: Path) -> None:
     p.mkdir(parents=True, exist_ok=True)
 
 
+# output key -> event field counted over failed attempts
+_PARETO_FIELDS: Tuple[Tuple[str, str], ...] = (
+    ("by_step", "test_step"),
+    ("by_error", "error_code"),
+    ("by_batch", "batch_id"),
+)
+
+
 def pareto_failures(events: List[Dict[str, Any]]) -> Dict[str, Dict[str, int]]:
     """Return counts for pareto analysis from raw events.
 
@@ -25,21 +37,37 @@ def pareto_failures(events: List[Dict[str, Any]]) -> Dict[str, Dict[str, int]]:
       - by_error: error_code -> failed_attempts
       - by_batch: batch_id -> failed_attempts
     """
-    by_step: Dict[str, int] = {}
-    by_error: Dict[str, int] = {}
-    by_batch: Dict[str, int] = {}
-
-    for ev in events:
-        if bool(ev.get("passed", False)):
+    # events_frame keeps str() keys: an explicit null error_code counts as "None", missing as ""
+    columns = ("passed", *(f for _, f in _PARETO_FIELDS))
+    return pareto_failures_df(events_frame(events, columns=columns))
+
+
+def pareto_failures_df(df: pd.DataFrame) -> Dict[str, Dict[str, int]]:
+    """pareto_failures over an events DataFrame (e.g. the dashboard frame), column-wise."""
+    out: Dict[str, Dict[str, int]] = {key: {} for key, _ in _PARETO_FIELDS}
+    if df.empty:
+        return out
+
+    if "passed" in df.columns:
+        failed = ~df["passed"].to_numpy(dtype=bool, na_value=False)
+    else:
+        failed = np.ones(len(df), dtype=bool)
+    if not failed.any():
+        return out
+
+    for key, field in _PARETO_FIELDS:
+        if field not in df.columns:
+            out[key] = {"": int(failed.sum())}
             continue
-        step = str(ev.get("test_step", ""))
-        code = str(ev.get("error_code", ""))
-        batch = str(ev.get("batch_id", ""))
-        by_step[step] = by_step.get(step, 0) + 1
-        by_error[code] = by_error.get(code, 0) + 1
-        by_batch[batch] = by_batch.get(batch, 0) + 1
+        vals = df.loc[failed, field]
+        # a null cell is an explicit null (the column exists): "None", as str(None) in
+        # pareto_failures; a missing column counts under "" above
+        vals = vals.astype(object).where(vals.notna(), "None").astype(str)
+        codes, uniques = pd.factorize(vals, sort=False)
+        counts = np.bincount(codes, minlength=len(uniques))
+        out[key] = dict(zip(uniques.tolist(), counts.tolist(), strict=True))
 
-    return {"by_step": by_step, "by_error": by_error, "by_batch": by_batch}
+    return out
 
 
 def write_pareto_csv(counts: Dict[str, Dict[str, int]], out_dir: Path) -> Dict[str, Path]:
@@ -52,26 +80,37 @@ def write_pareto_csv(counts: Dict[str, Dict[str, int]], out_dir: Path) -> Dict[s
         with path.open("w", newline="", encoding="utf-8") as f:
             w = csv.writer(f)
             w.writerow([key.replace("by_", ""), "failed_attempts"])
-            for name, c in items:
-                w.writerow([name, c])
+            w.writerows(items)
         out[key] = path
 
     return out
 
 
+# Reused across plot_pareto calls (run_analytics draws three): avoids a Figure/canvas
+# init per chart. Not thread-safe; analytics plots are drawn sequentially.
+_FIG: Optional[Figure] = None
+
+
 def plot_pareto(m: Dict[str, int], out_path: Path, *, title: str, top_n: int = 10) -> Path:
+    global _FIG
     items = sorted(m.items(), key=lambda kv: (-kv[1], kv[0]))[:top_n]
     labels = [k for k, _ in items]
     values = [v for _, v in items]
 
-    plt.figure()
-    plt.bar(labels, values)
-    plt.title(title)
-    plt.xlabel("category")
-    plt.ylabel("failed attempts")
-    plt.xticks(rotation=45, ha="right")
-    plt.tight_layout()
+    if _FIG is None:
+        _FIG = Figure()
+        _FIG.add_subplot()
+    fig = _FIG
+    ax = fig.axes[0]
+    ax.clear()
+    ax.bar(labels, values)
+    ax.set_title(title)
+    ax.set_xlabel("category")
+    ax.set_ylabel("failed attempts")
+    ax.tick_params(axis="x", labelrotation=45)
+    for t in ax.get_xticklabels():
+        t.set_horizontalalignment("right")
+    fig.tight_layout()
     out_path.parent.mkdir(parents=True, exist_ok=True)
-    plt.savefig(out_path)
-    plt.close()
+    fig.savefig(out_path)
     return out_path
@@ -6,13 +6,32 @@ from typing import Optional
 from mtap.analytics.io import read_events_jsonl
 from mtap.analytics.yield_analysis import compute_yields, write_yield_csv, write_step_rates_csv
 from mtap.analytics.pareto import pareto_failures, write_pareto_csv, plot_pareto
-from mtap.analytics.stratification import stratify, write_strat_csv
+from mtap.analytics.stratification import stratify_many, write_strat_csv
 
 
-def run_analytics(run_dir: Path) -> Path:
-    """Run analytics from raw logs only. Writes CSV summaries + plots under run_dir/analytics/."""
-    events = read_events_jsonl(run_dir / "events.jsonl")
+def _events_fingerprint(events_path: Path) -> Optional[str]:
+    # size + mtime identifies an append-only log cheaply (no content hash)
+    try:
+        st = events_path.stat()
+    except OSError:
+        return None
+    return f"{st.st_size}_{st.st_mtime_ns}"
+
+
+def run_analytics(run_dir: Path, *, force: bool = False) -> Path:
+    """Run analytics from raw logs only. Writes CSV summaries + plots under run_dir/analytics/.
+
+    Skips all work if outputs were already written for the current events.jsonl
+    (marker under analytics/.cache keyed by size+mtime) unless force=True.
+    """
+    events_path = run_dir / "events.jsonl"
     out_dir = run_dir / "analytics"
+    cache_dir = out_dir / ".cache"
+    fp = _events_fingerprint(events_path)
+    if fp is not None and not force and (cache_dir / fp).exists():
+        return out_dir
+
+    events = read_events_jsonl(events_path)
     out_dir.mkdir(parents=True, exist_ok=True)
 
     ys = compute_yields(events)
@@ -25,8 +44,14 @@ def run_analytics(run_dir: Path) -> Path:
     plot_pareto(pareto["by_error"], out_dir / "pareto_error_codes.png", title="Pareto: error codes")
     plot_pareto(pareto["by_batch"], out_dir / "pareto_batches.png", title="Pareto: batches")
 
-    for key in ["fw_version", "stage", "batch_id", "temp_bin"]:
-        rows = stratify(events, key=key)
+    for key, rows in stratify_many(events).items():
         write_strat_csv(rows, out_dir, key=key)
 
+    if fp is not None:
+        cache_dir.mkdir(exist_ok=True)
+        for stale in cache_dir.iterdir():
+            if stale.name != fp:
+                stale.unlink(missing_ok=True)
+        (cache_dir / fp).touch()
+
     return out_dir
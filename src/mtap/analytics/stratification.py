@@ -5,6 +5,11 @@ from dataclasses import dataclass
 from pathlib import Path
 from typing import Any, Dict, List, Optional, Tuple
 
+import numpy as np
+import pandas as pd
+
+from mtap.analytics.io import events_frame
+
 
 @dataclass(frozen=True)
 class StratRow:
@@ -16,85 +21,94 @@ class StratRow:
 
 def _final_pass_by_sn(events: List[Dict[str, Any]]) -> Dict[str, bool]:
     # Determine final pass per SN per step by max attempt; unit passes if all steps final passed
-    per_sn_steps: Dict[Tuple[str, str], Dict[str, Any]] = {}
-    steps = set()
-    sns = set()
-
+    df = events_frame(events)
+    n_steps = df.loc[df["test_step"] != "", "test_step"].nunique()
+    df = df[df["sn"] != ""]
+    sn_c, sns = pd.factorize(df["sn"], sort=False)
+
+    m = (df["test_step"] != "").to_numpy()
+    step_c, _ = pd.factorize(df["test_step"][m], sort=False)
+    sn_c_s = sn_c[m]
+    attempt = df["attempt"].to_numpy()[m]
+    passed = df["passed"].to_numpy()[m]
+
+    # Integer-coded rollup: lexsort is stable, so within an (SN, step) group the
+    # last row is the max attempt (later event on ties).
+    pair = sn_c_s.astype(np.int64) * max(n_steps, 1) + step_c
+    order = np.lexsort((attempt, pair))
+    pair_sorted = pair[order]
+    is_last = np.empty(len(order), dtype=bool)
+    is_last[:-1] = pair_sorted[1:] != pair_sorted[:-1]
+    is_last[-1:] = True
+    final = order[is_last]
+
+    n_sn = len(sns)
+    steps_seen = np.bincount(sn_c_s[final], minlength=n_sn)
+    final_fails = np.bincount(sn_c_s[final][~passed[final]], minlength=n_sn)
+    unit_pass = (steps_seen == n_steps) & (final_fails == 0)
+    return dict(zip(sns.tolist(), unit_pass.tolist(), strict=True))
+
+
+STRAT_KEYS: Tuple[str, ...] = ("fw_version", "stage", "batch_id", "temp_bin")
+
+
+def _temp_bin(avg: float) -> str:
+    # bins: <20, 20-30, 30-40, >=40
+    if avg < 20:
+        return "<20C"
+    if avg < 30:
+        return "20-30C"
+    if avg < 40:
+        return "30-40C"
+    return ">=40C"
+
+
+def _group_by_sn(events: List[Dict[str, Any]], keys: Tuple[str, ...]) -> Dict[str, Dict[str, str]]:
+    """key -> {sn -> group}, for all requested keys in one pass over events."""
+    for key in keys:
+        if key not in STRAT_KEYS:
+            raise ValueError(f"Unsupported stratification key: {key}")
+
+    out: Dict[str, Dict[str, str]] = {key: {} for key in keys}
+    # fw_version/stage/batch_id: pick the first seen (stable via timestamp order in logs)
+    first_keys = [k for k in keys if k != "temp_bin"]
+    want_temp = "temp_bin" in keys
+    seen: set = set()
+    # temp_bin: derive from temperature measurements (measurement==temp_c); average of PASS temps
+    temps: Dict[str, List[float]] = {}
+
+    # fields are normally already str: only coerce the odd non-str value
     for ev in events:
-        sn = str(ev.get("sn",""))
-        step = str(ev.get("test_step",""))
-        sns.add(sn)
-        steps.add(step)
-        key = (sn, step)
-        att = int(ev.get("attempt",1) or 1)
-        if key not in per_sn_steps or att >= int(per_sn_steps[key].get("attempt",1) or 1):
-            per_sn_steps[key] = ev
-
-    steps = {s for s in steps if s}
-    sns = {s for s in sns if s}
-
-    out: Dict[str, bool] = {}
-    for sn in sns:
-        ok = True
-        for step in steps:
-            key = (sn, step)
-            if key not in per_sn_steps:
-                ok = False
-                break
-            if not bool(per_sn_steps[key].get("passed", False)):
-                ok = False
-                break
-        out[sn] = ok
+        sn = ev.get("sn", "")
+        if type(sn) is not str:
+            sn = str(sn)
+        if first_keys and sn not in seen:
+            seen.add(sn)
+            for k in first_keys:
+                g = ev.get(k, "UNKNOWN")
+                out[k][sn] = g if type(g) is str else str(g)
+        if not want_temp:
+            continue
+        if ev.get("measurement") != "temp_c":
+            continue
+        if not ev.get("passed", False):
+            continue
+        v = ev.get("value", None)
+        if v is None:
+            continue
+        try:
+            temps.setdefault(sn, []).append(float(v))
+        except Exception:
+            continue
+
+    if want_temp:
+        out["temp_bin"] = {sn: _temp_bin(sum(xs)/len(xs)) for sn, xs in temps.items() if xs}
     return out
 
 
-def stratify(events: List[Dict[str, Any]], *, key: str) -> List[StratRow]:
-    """Compute FTY stratified by a field (fw_version, stage, batch_id, temp_bin)."""
-    final_pass = _final_pass_by_sn(events)
-
-    # Attach group values per SN
-    group_by_sn: Dict[str, str] = {}
-
-    if key in {"fw_version", "stage", "batch_id"}:
-        # pick the first seen (stable via timestamp order in logs)
-        for ev in events:
-            sn = str(ev.get("sn",""))
-            if sn in group_by_sn:
-                continue
-            group_by_sn[sn] = str(ev.get(key, "UNKNOWN"))
-    elif key == "temp_bin":
-        # derive from temperature measurements (measurement==temp_c); use average of PASS temps
-        temps: Dict[str, List[float]] = {}
-        for ev in events:
-            if str(ev.get("measurement","")) != "temp_c":
-                continue
-            if not bool(ev.get("passed", False)):
-                continue
-            sn = str(ev.get("sn",""))
-            v = ev.get("value", None)
-            if v is None:
-                continue
-            try:
-                temps.setdefault(sn, []).append(float(v))
-            except Exception:
-                continue
-        for sn, xs in temps.items():
-            if not xs:
-                continue
-            avg = sum(xs)/len(xs)
-            # bins: <20, 20-30, 30-40, >=40
-            if avg < 20:
-                b = "<20C"
-            elif avg < 30:
-                b = "20-30C"
-            elif avg < 40:
-                b = "30-40C"
-            else:
-                b = ">=40C"
-            group_by_sn[sn] = b
-    else:
-        raise ValueError(f"Unsupported stratification key: {key}")
-
+def _strat_rows(
+    key: str, final_pass: Dict[str, bool], group_by_sn: Dict[str, str]
+) -> List[StratRow]:
     # Aggregate
     groups: Dict[str, List[str]] = {}
     for sn, passed in final_pass.items():
@@ -114,12 +128,25 @@ def stratify(events: List[Dict[str, Any]], *, key: str) -> List[StratRow]:
     return rows
 
 
+def stratify_many(
+    events: List[Dict[str, Any]], keys: Tuple[str, ...] = STRAT_KEYS
+) -> Dict[str, List[StratRow]]:
+    """stratify() for several keys, sharing the final-pass rollup and a single events pass."""
+    group_by_key = _group_by_sn(events, tuple(keys))
+    final_pass = _final_pass_by_sn(events)
+    return {key: _strat_rows(key, final_pass, group_by_key[key]) for key in keys}
+
+
+def stratify(events: List[Dict[str, Any]], *, key: str) -> List[StratRow]:
+    """Compute FTY stratified by a field (fw_version, stage, batch_id, temp_bin)."""
+    return stratify_many(events, keys=(key,))[key]
+
+
 def write_strat_csv(rows: List[StratRow], out_dir: Path, *, key: str) -> Path:
     out_dir.mkdir(parents=True, exist_ok=True)
     path = out_dir / f"strat_{key}.csv"
     with path.open("w", newline="", encoding="utf-8") as f:
         w = csv.writer(f)
         w.writerow(["key", "group", "units", "fty"])
-        for r in rows:
-            w.writerow([r.key, r.group, r.units, round(r.fty, 6)])
+        w.writerows((r.key, r.group, r.units, round(r.fty, 6)) for r in rows)
     return path
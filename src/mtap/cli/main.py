@@ -19,11 +19,23 @@ def main() -> None:
     p_batch.add_argument("--stage", default="EVT")
     p_batch.add_argument("--plan", required=True, help="Path to test plan YAML")
     p_batch.add_argument("--sqlite", default="", help="Optional path to SQLite db for events")
+    p_batch.add_argument(
+        "--concurrency", type=int, default=1, help="SNs tested in parallel (1 = serial)"
+    )
+    p_batch.add_argument(
+        "--no-log-raw",
+        dest="log_raw",
+        action="store_false",
+        help="Leave full DUT responses out of events",
+    )
     p_batch.set_defaults(_entry="mtap.cli.run_batch")
 
     # analytics
     p_an = sub.add_parser("analytics", help="Run yield analytics for a run")
     p_an.add_argument("--run-dir", required=True, help="runs/<run_id>")
+    p_an.add_argument(
+        "--force", action="store_true", help="Recompute even if outputs are up to date"
+    )
     p_an.set_defaults(_entry="mtap.cli.run_analytics")
 
     args = p.parse_args()
@@ -48,16 +60,23 @@ def main() -> None:
             args.stage,
             "--plan",
             args.plan,
+            "--concurrency",
+            str(args.concurrency),
         ]
         if args.sqlite:
             argv += ["--sqlite", args.sqlite]
+        if not args.log_raw:
+            argv.append("--no-log-raw")
         _m(argv)
         return
 
     if args._entry == "mtap.cli.run_analytics":
         from mtap.cli.run_analytics import main as _m
 
-        _m(["--run-dir", args.run_dir])
+        argv = ["--run-dir", args.run_dir]
+        if args.force:
+            argv.append("--force")
+        _m(argv)
         return
 
     raise SystemExit(2)
@@ -9,9 +9,10 @@ from mtap.analytics.run_analytics import run_analytics
 def main(argv: list[str] | None = None) -> None:
     p = argparse.ArgumentParser(description="Run MTAP yield analytics from raw logs.")
     p.add_argument("--run-dir", required=True, help="runs/<run_id>")
+    p.add_argument("--force", action="store_true", help="Recompute even if outputs are up to date")
     args = p.parse_args(argv)
 
-    out_dir = run_analytics(Path(args.run_dir))
+    out_dir = run_analytics(Path(args.run_dir), force=args.force)
     print(f"[analytics] wrote outputs under: {out_dir}")
 
 if __name__ == "__main__":
@@ -1,10 +1,11 @@
 from __future__ import annotations
 
 import argparse
-import json
+import time
 from pathlib import Path
-from datetime import datetime, timezone
 
+from mtap.common.fastjson import dumps_bytes
+from mtap.common.fastyaml import safe_load
 from mtap.config import load_settings
 from mtap.runner.runner import TestRunner
 from mtap.reporting.report_generator import generate_report
@@ -22,12 +23,19 @@ def main(argv: list[str] | None = None) -> None:
     p.add_argument("--stage", default="")
     p.add_argument("--plan", required=True, help="Path to test plan YAML")
     p.add_argument("--sqlite", default="", help="Optional path to SQLite db for events")
+    p.add_argument("--concurrency", type=int, default=1, help="SNs tested in parallel (1 = serial)")
+    p.add_argument(
+        "--no-log-raw",
+        dest="log_raw",
+        action="store_false",
+        help="Leave full DUT responses out of events",
+    )
     args = p.parse_args(argv)
 
     s = load_settings()
     stage = args.stage or "EVT"
 
-    run_id = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+    run_id = time.strftime("%Y%m%dT%H%M%SZ", time.gmtime())
     run_dir = Path("runs") / run_id
     run_dir.mkdir(parents=True, exist_ok=True)
 
@@ -36,12 +44,11 @@ def main(argv: list[str] | None = None) -> None:
 
     # If sns not provided, auto-generate from plan sn_count if present
     if not sns:
-        import yaml
-        plan_raw = yaml.safe_load(plan_path.read_text(encoding="utf-8"))
+        plan_raw = safe_load(plan_path.read_bytes())
         n = int(((plan_raw.get("batch") or {}).get("sn_count")) or 1)
-        sns = [f"SN{str(i+1).zfill(4)}" for i in range(n)]
+        sns = [f"SN{i:04d}" for i in range(1, n + 1)]
 
-    runner = TestRunner(
+    with TestRunner(
         host=s.host,
         dut_port=s.dut_port,
         timeout_s_default=s.timeout_s,
@@ -51,12 +58,13 @@ def main(argv: list[str] | None = None) -> None:
         stage=stage,
         plan_path=plan_path,
         sqlite_db_path=Path(args.sqlite) if args.sqlite else None,
-    )
-
-    summary = runner.run_batch(run_id=run_id, sns=sns)
+        concurrency=args.concurrency,
+        log_raw=args.log_raw,
+    ) as runner:
+        summary = runner.run_batch(run_id=run_id, sns=sns)
 
-    (run_dir / "results_summary.json").write_text(
-        json.dumps(
+    (run_dir / "results_summary.json").write_bytes(
+        dumps_bytes(
             {
                 "run_id": summary.run_id,
                 "batch_id": summary.batch_id,
@@ -72,9 +80,8 @@ def main(argv: list[str] | None = None) -> None:
                     for sn, ss in summary.per_sn.items()
                 },
             },
-            indent=2,
-        ),
-        encoding="utf-8",
+            indent=True,
+        )
     )
 
     # Qualification report (HTML)
@@ -0,0 +1,32 @@
+from __future__ import annotations
+
+import json
+from typing import Any, Union
+
+try:
+    import orjson
+except ImportError:  # optional: pip install "mtap[speedups]"
+    orjson = None
+
+
+def _orjson_loads(data: Union[bytes, str]) -> Any:
+    try:
+        return orjson.loads(data)
+    except orjson.JSONDecodeError:
+        # stdlib accepts NaN/Infinity literals (json.dumps emits them); orjson does not
+        return json.loads(data)
+
+
+# json.loads, via orjson when installed. Accepts bytes or str (trailing newline ok).
+loads = _orjson_loads if orjson is not None else json.loads
+
+
+def dumps_bytes(obj: Any, *, indent: bool = False) -> bytes:
+    """Serialize to UTF-8 JSON bytes (orjson when installed); indent=True -> 2-space indent."""
+    if orjson is not None:
+        try:
+            return orjson.dumps(obj, option=orjson.OPT_INDENT_2 if indent else 0)
+        except TypeError:
+            # types orjson rejects (e.g. float subclasses, non-str keys): stdlib handles them
+            pass
+    return json.dumps(obj, indent=2 if indent else None).encode("utf-8")
@@ -0,0 +1,13 @@
+from __future__ import annotations
+
+from typing import Any, Union
+
+import yaml
+
+# libyaml-backed loader when PyYAML was built with it; same semantics as safe_load
+_Loader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
+
+def safe_load(text: Union[str, bytes]) -> Any:
+    """yaml.safe_load, via the C parser when available."""
+    return yaml.load(text, Loader=_Loader)
@@ -1,8 +1,11 @@
 from __future__ import annotations
 
-import random
-import string
+import secrets
 
 
 def make_sn(prefix: str = "SN", n: int = 4) -> str:
-    return f"{prefix}{''.join(random.choices(string.digits, k=n))}"
+    if n <= 0:
+        return prefix
+    # One OS-entropy draw for the whole n-digit suffix, zero-padded; independent of any
+    # seeding of the `random` module
+    return f"{prefix}{secrets.randbelow(10 ** n):0{n}d}"
@@ -1,6 +1,7 @@
 from __future__ import annotations
 
 import datetime
+import time
 
 
 def utc_now() -> datetime.datetime:
@@ -8,4 +9,5 @@ def utc_now() -> datetime.datetime:
 
 
 def utc_ts_compact() -> str:
-    return utc_now().strftime("%Y-%m-%dT%H-%M-%SZ")
+    # gmtime + strftime skips building a tz-aware datetime
+    return time.strftime("%Y-%m-%dT%H-%M-%SZ", time.gmtime())
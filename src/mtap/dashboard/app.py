@@ -14,9 +14,13 @@ if uploaded:
     st.metric("Passed", summary.get("passed_count", 0))
     st.metric("Failed", summary.get("failed_count", 0))
 
-    rows = []
-    for sn, info in (summary.get("per_sn") or {}).items():
-        rows.append({"sn": sn, "passed": info.get("passed", False), "failures": str(info.get("failures", []))})
-    st.dataframe(pd.DataFrame(rows))
+    # Columnar build: one list per column, no per-SN row dicts
+    per_sn = summary.get("per_sn") or {}
+    infos = list(per_sn.values())
+    st.dataframe(pd.DataFrame({
+        "sn": list(per_sn),
+        "passed": [info.get("passed", False) for info in infos],
+        "failures": [str(info.get("failures", [])) for info in infos],
+    }))
 else:
     st.info("Run `make run-batch` then upload runs/<run>/results_summary.json")
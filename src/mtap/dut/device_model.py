@@ -2,12 +2,30 @@ from __future__ import annotations
 
 import time
 from dataclasses import dataclass
-from typing import Dict
+from typing import Dict, List, Optional, Tuple
 
 import random
 
+import numpy as np
 
-@dataclass
+# Measurement noise is drawn from numpy in blocks (one refill per this many pairs)
+_NOISE_BLOCK = 4096
+
+# Physical signal bounds
+_TEMP_LO, _TEMP_HI = -40.0, 125.0
+_VBAT_LO, _VBAT_HI = 9.0, 16.0
+
+
+def _q4(x: float) -> float:
+    # 4-decimal quantization; ~2x faster than round(x, 4). Can differ from it only in
+    # the last digit, for values within an ulp of a half-way point.
+    try:
+        return round(x * 10000.0) / 10000.0
+    except (ValueError, OverflowError):
+        return x  # nan/inf pass through, as with round(x, 4)
+
+
+@dataclass(slots=True)
 class DeviceState:
     sn: str
     fw: str
@@ -35,35 +53,54 @@ class DeviceState:
 class DeviceModel:
     """Stateful DUT model with temperature + voltage + burn-in.
 
-    Deterministic mode is achieved by injecting a seeded RNG.
+    Deterministic mode is achieved by injecting a seeded RNG (and optionally the
+    same seed for the numpy noise generator; otherwise it is seeded from `rng`).
     """
 
-    def __init__(self, rng: random.Random, defaults: Dict) -> None:
+    def __init__(self, rng: random.Random, defaults: Dict, *, seed: Optional[int] = None) -> None:
         self._rng = rng
+        self._rand = rng.random  # bound once; hot paths call it directly
         self._defaults = defaults
         self._devices: Dict[str, DeviceState] = {}
+        self._norm_defaults = self._normalize_defaults(defaults)
+        self._np_rng = np.random.default_rng(seed if seed is not None else rng.getrandbits(64))
+        self._noise: List[float] = []
+        self._noise_idx = 0
+
+    @staticmethod
+    def _normalize_defaults(defaults: Dict) -> Dict:
+        # Coerced once; every new DeviceState starts from these
+        mode = str(defaults.get("mode", "NORMAL")).upper()
+        return dict(
+            fw=str(defaults.get("fw", "1.0.0")),
+            mode=mode if mode in {"NORMAL", "SAFE"} else "NORMAL",
+            temp_c=float(defaults.get("temp_c", 25.0)),
+            vbat_v=float(defaults.get("vbat_v", 12.0)),
+            temp_noise_sigma=float(defaults.get("temp_noise_sigma", 0.05)),
+            vbat_noise_sigma=float(defaults.get("vbat_noise_sigma", 0.02)),
+            temp_drift_per_cycle_c=float(defaults.get("temp_drift_per_cycle_c", 0.0)),
+            vbat_drift_per_cycle_v=float(defaults.get("vbat_drift_per_cycle_v", 0.0)),
+            self_test_fail_p_base=float(defaults.get("self_test_fail_p_base", 0.01)),
+            burn_in_fail_slope=float(defaults.get("burn_in_fail_slope", 0.00005)),
+        )
+
+    def _next_noise_pair(self) -> Tuple[float, float]:
+        # Standard normals, pre-drawn in blocks and kept as Python floats (JSON-ready)
+        i = self._noise_idx
+        if i >= len(self._noise):
+            self._noise = self._np_rng.standard_normal(2 * _NOISE_BLOCK).tolist()
+            i = 0
+        self._noise_idx = i + 2
+        return self._noise[i], self._noise[i + 1]
 
     def get_or_create(self, sn: str) -> DeviceState:
-        if sn not in self._devices:
-            d = DeviceState(
-                sn=sn,
-                fw=str(self._defaults.get("fw", "1.0.0")),
-                mode=str(self._defaults.get("mode", "NORMAL")).upper(),
-                temp_c=float(self._defaults.get("temp_c", 25.0)),
-                vbat_v=float(self._defaults.get("vbat_v", 12.0)),
-                temp_noise_sigma=float(self._defaults.get("temp_noise_sigma", 0.05)),
-                vbat_noise_sigma=float(self._defaults.get("vbat_noise_sigma", 0.02)),
-                temp_drift_per_cycle_c=float(self._defaults.get("temp_drift_per_cycle_c", 0.0)),
-                vbat_drift_per_cycle_v=float(self._defaults.get("vbat_drift_per_cycle_v", 0.0)),
-                self_test_fail_p_base=float(self._defaults.get("self_test_fail_p_base", 0.01)),
-                burn_in_fail_slope=float(self._defaults.get("burn_in_fail_slope", 0.00005)),
-                cycles=0,
-                last_update_s=time.time(),
+        try:
+            return self._devices[sn]
+        except KeyError:
+            d = self._devices[sn] = DeviceState(
+                sn=sn, **self._norm_defaults, cycles=0, last_update_s=time.time()
             )
-            if d.mode not in {"NORMAL", "SAFE"}:
-                d.mode = "NORMAL"
-            self._devices[sn] = d
-        return self._devices[sn]
+            return d
 
     def _update_signals(self, d: DeviceState) -> None:
         now = time.time()
@@ -71,14 +108,14 @@ class DeviceModel:
         d.last_update_s = now
 
         # Small time-based random walk (SAFE is more stable)
-        wander_scale = 0.01 if d.mode == "NORMAL" else 0.005
-        d.temp_c += wander_scale * dt * (self._rng.random() - 0.5)
-
-        v_wander_scale = 0.005 if d.mode == "NORMAL" else 0.003
-        d.vbat_v += v_wander_scale * dt * (self._rng.random() - 0.5)
+        rand = self._rand
+        normal = d.mode == "NORMAL"
+        t = d.temp_c + (0.01 if normal else 0.005) * dt * (rand() - 0.5)
+        v = d.vbat_v + (0.005 if normal else 0.003) * dt * (rand() - 0.5)
 
-        d.temp_c = min(max(d.temp_c, -40.0), 125.0)
-        d.vbat_v = min(max(d.vbat_v, 9.0), 16.0)
+        # Clamp with plain comparisons (no min/max calls)
+        d.temp_c = _TEMP_LO if t < _TEMP_LO else _TEMP_HI if t > _TEMP_HI else t
+        d.vbat_v = _VBAT_LO if v < _VBAT_LO else _VBAT_HI if v > _VBAT_HI else v
 
     def _apply_burn_in(self, d: DeviceState) -> None:
         d.cycles += 1
@@ -92,7 +129,7 @@ class DeviceModel:
             "sn": d.sn,
             "fw": d.fw,
             "mode": d.mode,
-            "vbat_v": round(d.vbat_v + d.drift_offset_v, 4),
+            "vbat_v": _q4(d.vbat_v + d.drift_offset_v),
         }
 
     def read_temp(self, sn: str) -> Dict:
@@ -103,13 +140,14 @@ class DeviceModel:
         temp_true = d.temp_c + d.drift_offset_c
         vbat_true = d.vbat_v + d.drift_offset_v
 
-        temp_meas = temp_true + self._rng.gauss(0.0, d.temp_noise_sigma)
-        vbat_meas = vbat_true + self._rng.gauss(0.0, d.vbat_noise_sigma)
+        n_t, n_v = self._next_noise_pair()
+        temp_meas = temp_true + n_t * d.temp_noise_sigma
+        vbat_meas = vbat_true + n_v * d.vbat_noise_sigma
 
         return {
             "sn": d.sn,
-            "temp_c": round(temp_meas, 4),
-            "vbat_v": round(vbat_meas, 4),
+            "temp_c": _q4(temp_meas),
+            "vbat_v": _q4(vbat_meas),
             "cycles": d.cycles,
         }
 
@@ -122,7 +160,7 @@ class DeviceModel:
         if d.mode == "SAFE":
             p_fail *= 0.7
 
-        failed = self._rng.random() < p_fail
+        failed = self._rand() < p_fail
         return {
             "sn": d.sn,
             "self_test_ok": (not failed),
@@ -133,7 +171,7 @@ class DeviceModel:
     def set_temp(self, sn: str, temp_c: float) -> Dict:
         d = self.get_or_create(sn)
         d.temp_c = float(temp_c)
-        return {"sn": d.sn, "temp_c": round(d.temp_c, 4)}
+        return {"sn": d.sn, "temp_c": _q4(d.temp_c)}
 
     def set_mode(self, sn: str, mode: str) -> Dict:
         d = self.get_or_create(sn)
@@ -5,6 +5,8 @@ from dataclasses import dataclass
 from typing import Any, Dict, Optional, Tuple
 import random
 
+import numpy as np
+
 from .protocol import E_BUSY, E_INTERNAL, E_TIMEOUT
 
 
@@ -29,7 +31,7 @@ class BusyDecision:
     message: str
 
 
-@dataclass
+@dataclass(slots=True)
 class FaultContext:
     markov_state: str = "GOOD"  # GOOD | BAD
     last_cmd_ts: float = 0.0
@@ -38,33 +40,92 @@ class FaultContext:
 class FaultInjector:
     """Industrial-grade fault injection with per-command toggles + Markov bursts."""
 
+    _SECTIONS = ("timeout", "fail", "drift", "burn_in", "busy")
+
     def __init__(self, rng: random.Random, profile: Dict[str, Any]) -> None:
         self._rng = rng
         self.profile = profile
         self._ctx: Dict[Tuple[str, str], FaultContext] = {}
 
+    @property
+    def profile(self) -> Dict[str, Any]:
+        return self._profile
+
+    @profile.setter
+    def profile(self, profile: Dict[str, Any]) -> None:
+        # Reassign (not mutate in place) to change faults: merged configs are rebuilt here
+        self._profile = profile
+        self._rebuild_cache()
+
+    def _rebuild_cache(self) -> None:
+        base = (self._profile.get("default") or {})
+        per_command = (self._profile.get("per_command") or {})
+
+        def merged(per: Dict[str, Any]) -> Dict[str, Dict[str, Any]]:
+            out: Dict[str, Dict[str, Any]] = {}
+            for section in self._SECTIONS:
+                d = dict(base.get(section) or {})
+                d.update(per.get(section) or {})
+                out[section] = d
+            return out
+
+        self._default_cfg = merged({})
+        self._merged = {cmd: merged(per or {}) for cmd, per in per_command.items()}
+
+        # Burn-in uses the READ_TEMP config (common across commands); coefficients per 1k cycles
+        b = self._cfg_for("READ_TEMP")["burn_in"]
+        self._burn_fail_per_1k = float(b.get("fail_p_multiplier_per_1k_cycles", 0.0))
+        self._burn_drift_per_1k = float(b.get("drift_multiplier_per_1k_cycles", 0.0))
+
+        # Markov parameters, read once; disabled (the common case) short-circuits every hook
+        m = self._profile.get("intermittent_markov") or {}
+        self._markov = m
+        self._markov_enabled = bool(m.get("enabled", False))
+        self._markov_p_gb = float(m.get("p_good_to_bad", 0.0))
+        self._markov_p_bg = float(m.get("p_bad_to_good", 0.0))
+
+        # No fault can fire for any command: evaluate() can skip the checks. It still burns the
+        # RNG draws they make on a PASS (should_fail, should_timeout and its delay), since the
+        # seeded stream is shared with DeviceModel and measurements must not shift.
+        cfgs = [self._default_cfg, *self._merged.values()]
+        self._is_noop = not self._markov_enabled and all(
+            float(c["timeout"].get("p", 0.0)) <= 0.0
+            and float(c["fail"].get("p", 0.0)) <= 0.0
+            and float(c["busy"].get("p", 0.0)) <= 0.0
+            and int(c["busy"].get("min_interval_ms", 0)) <= 0
+            for c in cfgs
+        )
+
+        def pass_draws(c: Dict[str, Dict[str, Any]]) -> int:
+            _, hi = c["timeout"].get("delay_s", [0.0, 0.0])
+            return 3 if float(hi) > 0 else 2
+
+        self._default_pass_draws = pass_draws(self._default_cfg)
+        self._pass_draws = {cmd: pass_draws(c) for cmd, c in self._merged.items()}
+
+        # Per-command drift coefficients (temp, vbat)
+        def drift(c: Dict[str, Dict[str, Any]]) -> Tuple[float, float]:
+            d = c["drift"]
+            return (
+                float(d.get("temp_offset_per_cycle_c", 0.0)),
+                float(d.get("vbat_offset_per_cycle_v", 0.0)),
+            )
+
+        self._default_drift = drift(self._default_cfg)
+        self._drift = {cmd: drift(c) for cmd, c in self._merged.items()}
+
     def _cfg_for(self, cmd: str) -> Dict[str, Any]:
-        base = (self.profile.get("default") or {})
-        per = (self.profile.get("per_command") or {}).get(cmd, {}) or {}
-
-        def merged(section: str) -> Dict[str, Any]:
-            d = dict(base.get(section) or {})
-            d.update(per.get(section) or {})
-            return d
-
-        return {
-            "timeout": merged("timeout"),
-            "fail": merged("fail"),
-            "drift": merged("drift"),
-            "burn_in": merged("burn_in"),
-            "busy": merged("busy"),
-        }
+        # Precomputed per profile; shared dicts, read-only
+        return self._merged.get(cmd, self._default_cfg)
 
     def _ctx_for(self, sn: str, cmd: str) -> FaultContext:
+        # EAFP: one hash lookup once the (sn, cmd) context exists
         key = (sn, cmd)
-        if key not in self._ctx:
-            self._ctx[key] = FaultContext()
-        return self._ctx[key]
+        try:
+            return self._ctx[key]
+        except KeyError:
+            ctx = self._ctx[key] = FaultContext()
+            return ctx
 
     # ---- required APIs ----
     def should_timeout(self, cmd: str, sn: str, cycles: int) -> TimeoutDecision:
@@ -92,28 +153,47 @@ class FaultInjector:
             return FailDecision(True, E_INTERNAL, "Simulated intermittent/internal fault")
         return FailDecision(False, "", "")
 
+    def should_fail_batch(self, cmd: str, sn: str, cycles: np.ndarray) -> np.ndarray:
+        """should_fail(...).should for each entry of `cycles`, as a bool array.
+
+        Consumes the RNG exactly like the equivalent sequence of should_fail calls.
+        Without Markov bursts the threshold is computed in NumPy for all cycles at once;
+        Markov state is sequential, so that case falls back to per-call evaluation.
+        """
+        cycles = np.asarray(cycles)
+        if self._markov_enabled:
+            flags = (self.should_fail(cmd, sn, int(c)).should for c in cycles.flat)
+            return np.fromiter(flags, dtype=bool, count=cycles.size).reshape(cycles.shape)
+
+        p = float(self._cfg_for(cmd)["fail"].get("p", 0.0))
+        mult = np.maximum(0.0, 1.0 + self._burn_fail_per_1k * (cycles / 1000.0))
+        p_eff = np.minimum(1.0, p * mult)
+        rand = self._rng.random
+        u = np.fromiter((rand() for _ in range(cycles.size)), dtype=float, count=cycles.size)
+        return u.reshape(cycles.shape) < p_eff
+
     def apply_drift(self, cmd: str, cycles: int, *, temp_offset_c: float, vbat_offset_v: float) -> Tuple[float, float]:
-        cfg = self._cfg_for(cmd)["drift"]
-        dtemp = float(cfg.get("temp_offset_per_cycle_c", 0.0))
-        dv = float(cfg.get("vbat_offset_per_cycle_v", 0.0))
+        dtemp, dv = self._drift.get(cmd, self._default_drift)
+        if not dtemp and not dv:
+            return (temp_offset_c, vbat_offset_v)
         mult = self.burn_in_effect(cycles).get("drift_multiplier", 1.0)
         return (temp_offset_c + dtemp * mult, vbat_offset_v + dv * mult)
 
     def burn_in_effect(self, cycles: int) -> Dict[str, float]:
-        # Use default burn_in config (common across commands)
-        b = self._cfg_for("READ_TEMP")["burn_in"]
+        # Coefficients precomputed in _rebuild_cache
         k = cycles / 1000.0
-        fail_mult = 1.0 + float(b.get("fail_p_multiplier_per_1k_cycles", 0.0)) * k
-        drift_mult = 1.0 + float(b.get("drift_multiplier_per_1k_cycles", 0.0)) * k
+        fail_mult = 1.0 + self._burn_fail_per_1k * k
+        drift_mult = 1.0 + self._burn_drift_per_1k * k
         return {"fail_multiplier": max(0.0, fail_mult), "drift_multiplier": max(0.0, drift_mult)}
 
-    def should_busy(self, cmd: str, sn: str) -> BusyDecision:
+    def should_busy(self, cmd: str, sn: str, now: Optional[float] = None) -> BusyDecision:
         cfg = self._cfg_for(cmd)["busy"]
         min_interval_ms = int(cfg.get("min_interval_ms", 0))
         p = float(cfg.get("p", 0.0))
 
         ctx = self._ctx_for(sn, cmd)
-        now = time.time()
+        if now is None:
+            now = time.time()
 
         # Deterministic rate limit: reject if called too soon after last SUCCESSFUL dispatch
         if min_interval_ms > 0 and ctx.last_cmd_ts > 0 and (now - ctx.last_cmd_ts) * 1000.0 < min_interval_ms:
@@ -127,38 +207,34 @@ class FaultInjector:
 
     # ---- Markov intermittent ----
     def _markov_cfg(self) -> Dict[str, Any]:
-        return self.profile.get("intermittent_markov") or {}
+        return self._markov
 
     def _markov_step(self, cmd: str, sn: str) -> str:
-        m = self._markov_cfg()
-        if not bool(m.get("enabled", False)):
+        if not self._markov_enabled:
             return "GOOD"
         ctx = self._ctx_for(sn, cmd)
-        p_gb = float(m.get("p_good_to_bad", 0.0))
-        p_bg = float(m.get("p_bad_to_good", 0.0))
 
-        if ctx.markov_state == "GOOD" and self._rng.random() < p_gb:
+        if ctx.markov_state == "GOOD" and self._rng.random() < self._markov_p_gb:
             ctx.markov_state = "BAD"
-        elif ctx.markov_state == "BAD" and self._rng.random() < p_bg:
+        elif ctx.markov_state == "BAD" and self._rng.random() < self._markov_p_bg:
             ctx.markov_state = "GOOD"
         return ctx.markov_state
 
     def _markov_fail_add(self, cmd: str, sn: str) -> float:
-        m = self._markov_cfg()
-        if not bool(m.get("enabled", False)):
+        if not self._markov_enabled:
             return 0.0
         st = self._markov_step(cmd, sn)
         if st != "BAD":
             return 0.0
-        return float(m.get("fail_p_bad_state", 0.0))
+        return float(self._markov.get("fail_p_bad_state", 0.0))
 
     def _markov_timeout_add(self, cmd: str, sn: str) -> Tuple[float, Optional[float]]:
-        m = self._markov_cfg()
-        if not bool(m.get("enabled", False)):
+        if not self._markov_enabled:
             return 0.0, None
         st = self._markov_step(cmd, sn)
         if st != "BAD":
             return 0.0, None
+        m = self._markov
         p = float(m.get("timeout_p_bad_state", 0.0))
         lo, hi = m.get("timeout_delay_s", [0.0, 0.0])
         delay = float(self._rng.uniform(float(lo), float(hi))) if float(hi) > 0 else None
@@ -166,9 +242,18 @@ class FaultInjector:
 
     # ---- server-facing evaluation ----
     def evaluate(self, cmd: str, sn: str, cycles: int) -> Dict[str, Any]:
+        # One clock read per request, shared by the rate limiter and the timestamp.
+        now = time.time()
+        if self._is_noop:
+            rand = self._rng.random
+            for _ in range(self._pass_draws.get(cmd, self._default_pass_draws)):
+                rand()
+            self._ctx_for(sn, cmd).last_cmd_ts = now
+            return {"action": "PASS"}
+
         # Check BUSY *before* updating the timestamp — the rate limiter must
         # compare against the last *successful* dispatch, not the current call.
-        busy = self.should_busy(cmd, sn)
+        busy = self.should_busy(cmd, sn, now)
         if busy.should:
             return {"action": "RESPOND", "error_code": busy.error_code, "message": busy.message}
 
@@ -177,18 +262,18 @@ class FaultInjector:
             # Update timestamp: the DUT accepted the command (even though it
             # returned a simulated failure), so the rate-limiter should reset.
             ctx = self._ctx_for(sn, cmd)
-            ctx.last_cmd_ts = time.time()
+            ctx.last_cmd_ts = now
             return {"action": "RESPOND", "error_code": fail.error_code, "message": fail.message}
 
         to = self.should_timeout(cmd, sn, cycles)
         if to.should:
             ctx = self._ctx_for(sn, cmd)
-            ctx.last_cmd_ts = time.time()
+            ctx.last_cmd_ts = now
             if to.mode == "drop":
                 return {"action": "DROP", "delay_s": to.delay_s}
             return {"action": "DELAY", "delay_s": to.delay_s}
 
         # Command will proceed normally — update timestamp
         ctx = self._ctx_for(sn, cmd)
-        ctx.last_cmd_ts = time.time()
+        ctx.last_cmd_ts = now
         return {"action": "PASS"}
@@ -28,6 +28,18 @@ def parse_command(line: str) -> Tuple[str, List[str]]:
     return cmd, args
 
 
+def parse_command_bytes(line: bytes) -> Tuple[str, List[str]]:
+    """Same as parse_command, but straight from the received line bytes.
+
+    Raises UnicodeDecodeError on invalid UTF-8.
+    """
+    # One decode of the (short) line beats decoding each token separately
+    parts = line.decode("utf-8").split()
+    if not parts:
+        return "", []
+    return parts[0].upper(), parts[1:]
+
+
 @dataclass(frozen=True)
 class Response:
     ok: bool
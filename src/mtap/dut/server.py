@@ -1,20 +1,44 @@
 from __future__ import annotations
 
-import json
+import functools
 import importlib.resources as importlib_resources
 import socket
 import threading
 import time
 from pathlib import Path
-from typing import Dict, Tuple, Optional
+from typing import Dict, List, Tuple, Optional
 import random
 import os
 
-import yaml
+from mtap.common.fastjson import dumps_bytes
+from mtap.common.fastyaml import safe_load
 
 from .device_model import DeviceModel
 from .fault_injection import FaultInjector
-from .protocol import E_BAD_ARGS, E_OUT_OF_RANGE, E_UNKNOWN_CMD, err, ok, parse_command
+from .protocol import E_BAD_ARGS, E_OUT_OF_RANGE, E_UNKNOWN_CMD, err, ok, parse_command_bytes
+
+_RECV_BUFSIZE = 65536
+_LISTEN_BACKLOG = 1024
+
+
+@functools.lru_cache(maxsize=8)
+def _load_yaml_file_cached(path_str: str, mtime_ns: int) -> Dict:
+    # keyed by mtime too, so an edited config is re-read
+    return safe_load(Path(path_str).read_bytes()) or {}
+
+
+@functools.lru_cache(maxsize=1)
+def _load_packaged_dut_config() -> Dict:
+    try:
+        data = importlib_resources.files("mtap").joinpath("resources/dut_config.yaml").read_bytes()
+        return safe_load(data) or {}
+    except Exception:
+        return {}
+
+
+def _load_yaml_file(path: Path) -> Dict:
+    p = path.resolve()
+    return _load_yaml_file_cached(str(p), p.stat().st_mtime_ns)
 
 
 def _load_dut_config(path: Optional[Path]) -> Dict:
@@ -25,25 +49,23 @@ def _load_dut_config(path: Optional[Path]) -> Dict:
     2) MTAP_DUT_CONFIG env var (if set + exists)
     3) CWD-relative dut/config.yaml (dev workflow)
     4) Packaged default (mtap/resources/dut_config.yaml)
+
+    Parsed configs are memoized per process and shared: treat them as read-only.
     """
     if path is not None and path.exists():
-        return yaml.safe_load(path.read_text(encoding="utf-8")) or {}
+        return _load_yaml_file(path)
 
     env_path = os.getenv("MTAP_DUT_CONFIG", "").strip()
     if env_path:
         p = Path(env_path)
         if p.exists():
-            return yaml.safe_load(p.read_text(encoding="utf-8")) or {}
+            return _load_yaml_file(p)
 
     dev = Path("dut/config.yaml")
     if dev.exists():
-        return yaml.safe_load(dev.read_text(encoding="utf-8")) or {}
+        return _load_yaml_file(dev)
 
-    try:
-        txt = importlib_resources.files("mtap").joinpath("resources/dut_config.yaml").read_text(encoding="utf-8")
-        return yaml.safe_load(txt) or {}
-    except Exception:
-        return {}
+    return _load_packaged_dut_config()
 
 
 class DutServer:
@@ -61,11 +83,11 @@ class DutServer:
         seed = int(((cfg.get("determinism") or {}).get("seed")) or 0) or None
         self._rng = random.Random(seed)
 
+        self._profiles: Dict[str, Dict] = cfg.get("fault_profiles") or {}
         prof_name = os.getenv("MTAP_FAULT_PROFILE", str(cfg.get("default_fault_profile", "clean")))
-        prof = (cfg.get("fault_profiles") or {}).get(prof_name) or (cfg.get("fault_profiles") or {}).get("clean") or {}
-        self.faults = FaultInjector(self._rng, prof)
+        self.faults = FaultInjector(self._rng, self._profile_for(prof_name))
 
-        self.device = DeviceModel(self._rng, defaults=(cfg.get("device_defaults") or {}))
+        self.device = DeviceModel(self._rng, defaults=(cfg.get("device_defaults") or {}), seed=seed)
 
     def stop(self) -> None:
         self._stop.set()
@@ -77,35 +99,56 @@ class DutServer:
 
     def _handle(self, conn: socket.socket, addr: Tuple[str, int]) -> None:
         with conn:
-            buf = b""
+            # Small request/response pairs: don't let Nagle hold replies back
+            try:
+                conn.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+                conn.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, _RECV_BUFSIZE)
+            except OSError:
+                pass
+            # bytearray + find/del: appends and consumed-line removal don't copy the whole buffer
+            buf = bytearray()
             while not self._stop.is_set():
                 try:
-                    chunk = conn.recv(4096)
+                    chunk = conn.recv(_RECV_BUFSIZE)
                 except OSError:
                     return
                 if not chunk:
                     return
                 buf += chunk
-                while b"\n" in buf:
-                    line, buf = buf.split(b"\n", 1)
+                # Responses to every line in this chunk go out in a single sendall
+                out: List[bytes] = []
+                dropped = False
+                while True:
+                    i = buf.find(b"\n")
+                    if i < 0:
+                        break
+                    line = bytes(buf[:i])
+                    del buf[: i + 1]
                     if not line.strip():
                         continue
                     resp = self._dispatch(line)
                     if resp is None:
                         # Simulate "no response" (DROP)
-                        return
+                        dropped = True
+                        break
+                    out.append(dumps_bytes(resp) + b"\n")
+                if out:
                     try:
-                        conn.sendall((json.dumps(resp) + "\n").encode("utf-8"))
+                        conn.sendall(b"".join(out))
                     except OSError:
                         return
+                if dropped:
+                    return
+
+    def _profile_for(self, name: str) -> Dict:
+        return self._profiles.get(name) or self._profiles.get("clean") or {}
 
     def _set_profile(self, name: str) -> None:
-        prof = (self._cfg.get("fault_profiles") or {}).get(name) or (self._cfg.get("fault_profiles") or {}).get("clean") or {}
-        self.faults.profile = prof
+        self.faults.profile = self._profile_for(name)
 
     def _dispatch(self, line: bytes) -> Optional[Dict]:
         try:
-            cmd, args = parse_command(line.decode("utf-8"))
+            cmd, args = parse_command_bytes(line)
         except Exception:
             return err(E_BAD_ARGS, "Invalid UTF-8 request line", cmd="(decode)")
 
@@ -177,7 +220,8 @@ class DutServer:
             self._sock = s
             s.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
             s.bind((self.host, self.port))
-            s.listen()
+            # deep backlog so bursts of runner connections are not dropped
+            s.listen(_LISTEN_BACKLOG)
             s.settimeout(0.5)
             print(f"[DUT] listening on {self.host}:{self.port}")
 
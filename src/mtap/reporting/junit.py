@@ -1,23 +1,38 @@
 from __future__ import annotations
 
 from pathlib import Path
-from typing import Dict
-from xml.etree.ElementTree import Element, SubElement, tostring
+from typing import Dict, List
+from xml.sax.saxutils import escape
+
+# Same escaping ElementTree.tostring applies to attribute values
+_ATTR_ENTITIES = {'"': "&quot;", "\r": "&#13;", "\n": "&#10;", "\t": "&#09;"}
+
+
+def _attr(value: str) -> str:
+    return escape(value, _ATTR_ENTITIES)
 
 
 def write_junit(path: Path, summary: Dict) -> None:
-    testsuite = Element("testsuite")
-    testsuite.set("name", "mtap_batch")
-    testsuite.set("tests", str(summary.get("sn_count", 0)))
-    testsuite.set("failures", str(summary.get("failed_count", 0)))
+    # Assembled as text directly (no Element tree); byte-identical to ElementTree.tostring
+    head = (
+        f'<testsuite name="mtap_batch" tests="{_attr(str(summary.get("sn_count", 0)))}"'
+        f' failures="{_attr(str(summary.get("failed_count", 0)))}"'
+    )
 
     per_sn = summary.get("per_sn") or {}
+    if not per_sn:
+        path.write_bytes(f"{head} />".encode())
+        return
+
+    parts: List[str] = [head, ">"]
     for sn, info in per_sn.items():
-        tc = SubElement(testsuite, "testcase")
-        tc.set("classname", "mtap")
-        tc.set("name", sn)
-        if not info.get("passed", False):
-            f = SubElement(tc, "failure")
-            f.text = str(info.get("failures", []))
-
-    path.write_bytes(tostring(testsuite, encoding="utf-8"))
+        if info.get("passed", False):
+            parts.append(f'<testcase classname="mtap" name="{_attr(sn)}" />')
+        else:
+            failures = escape(str(info.get("failures", [])))
+            parts.append(
+                f'<testcase classname="mtap" name="{_attr(sn)}">'
+                f"<failure>{failures}</failure></testcase>"
+            )
+    parts.append("</testsuite>")
+    path.write_bytes("".join(parts).encode("utf-8"))
@@ -1,11 +1,13 @@
 from __future__ import annotations
 
 import csv
-import json
-from dataclasses import dataclass, asdict
-from datetime import datetime, timezone
+import threading
+import time
+from dataclasses import dataclass
 from pathlib import Path
-from typing import Any, Dict, Optional, List
+from typing import Any, Dict, Optional, List, Tuple
+
+from mtap.common.fastjson import dumps_bytes
 
 
 LOG_SCHEMA_VERSION = 1
@@ -37,11 +39,23 @@ CSV_COLUMNS: List[str] = [
 ]
 
 
-def _utc_now_iso() -> str:
-    return datetime.now(timezone.utc).isoformat()
+# (epoch second, "YYYY-MM-DDTHH:MM:SS") of the last timestamp; events in the same second reuse it
+_ts_prefix: Tuple[int, str] = (-1, "")
 
 
-@dataclass(frozen=True)
+def _utc_now_iso() -> str:
+    """Same string as datetime.now(timezone.utc).isoformat(), without building a datetime."""
+    global _ts_prefix
+    secs, us = divmod(time.time_ns() // 1000, 1_000_000)
+    cached_secs, prefix = _ts_prefix
+    if secs != cached_secs:
+        prefix = time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(secs))
+        _ts_prefix = (secs, prefix)
+    # isoformat() drops the fraction when it is exactly zero
+    return f"{prefix}.{us:06d}+00:00" if us else f"{prefix}+00:00"
+
+
+@dataclass(frozen=True, slots=True)
 class StepEvent:
     # Meta
     schema_version: int
@@ -128,19 +142,48 @@ class StepEvent:
             data=data or {},
         )
 
-    def to_jsonl_dict(self) -> Dict[str, Any]:
-        d = asdict(self)
-        # keep 'data' in JSONL
-        return d
+    def to_csv_tuple(self) -> Tuple[Any, ...]:
+        # Positional, in CSV_COLUMNS order (no asdict() deep copy)
+        return (
+            self.schema_version,
+            self.timestamp,
+            self.run_id,
+            self.batch_id,
+            self.station_id,
+            self.stage,
+            self.sn,
+            self.fw_version,
+            self.test_step,
+            self.command,
+            self.attempt,
+            self.retry_count,
+            self.retries_allowed,
+            self.timeout_s,
+            self.backoff_ms,
+            self.duration_ms,
+            self.passed,
+            self.error_code,
+            self.measurement,
+            self.value,
+            self.units,
+            self.message,
+        )
 
-    def to_csv_row(self) -> Dict[str, Any]:
-        d = asdict(self)
-        d.pop("data", None)  # CSV is flat
-        return d
+    def to_jsonl_bytes(self) -> bytes:
+        # Every field, `data` last; `data` is serialized in place (no asdict() deep copy)
+        d = dict(zip(CSV_COLUMNS, self.to_csv_tuple(), strict=True))
+        d["data"] = self.data
+        return dumps_bytes(d)
 
 
 class RunLogger:
-    """Append-only logger: emits one JSONL row per attempt + mirrored CSV row."""
+    """Append-only logger: emits one JSONL row per attempt + mirrored CSV row.
+
+    Both files stay open (buffered) for the logger's lifetime; call flush() to make
+    rows visible to readers, or close() / use as a context manager when done.
+    """
+
+    _BUFFERING = 65536
 
     def __init__(self, run_dir: Path) -> None:
         self.run_dir = run_dir
@@ -148,20 +191,41 @@ class RunLogger:
         self.jsonl_path = self.run_dir / "events.jsonl"
         self.csv_path = self.run_dir / "events.csv"
 
+        new_csv = not self.csv_path.exists()
+        # binary: events are serialized straight to UTF-8 bytes
+        self._jsonl_f = self.jsonl_path.open("ab", buffering=self._BUFFERING)
+        self._csv_f = self.csv_path.open(
+            "a", newline="", encoding="utf-8", buffering=self._BUFFERING
+        )
+        self._csv_writer = csv.writer(self._csv_f)
+        # runner worker threads share one logger
+        self._lock = threading.Lock()
+
         # Initialize CSV header once
-        if not self.csv_path.exists():
-            with self.csv_path.open("w", newline="", encoding="utf-8") as f:
-                writer = csv.DictWriter(f, fieldnames=CSV_COLUMNS)
-                writer.writeheader()
+        if new_csv:
+            self._csv_writer.writerow(CSV_COLUMNS)
 
     def log(self, ev: StepEvent) -> None:
-        # JSONL (append-only)
-        with self.jsonl_path.open("a", encoding="utf-8") as f:
-            f.write(json.dumps(ev.to_jsonl_dict(), ensure_ascii=False) + "\n")
-
-        # CSV (append-only, stable columns)
-        with self.csv_path.open("a", newline="", encoding="utf-8") as f:
-            writer = csv.DictWriter(f, fieldnames=CSV_COLUMNS)
-            row = ev.to_csv_row()
-            # ensure only known columns (future-proof: missing -> blank)
-            writer.writerow({k: row.get(k, "") for k in CSV_COLUMNS})
+        line = ev.to_jsonl_bytes() + b"\n"
+        row = ev.to_csv_tuple()
+        with self._lock:
+            # JSONL (append-only)
+            self._jsonl_f.write(line)
+            # CSV (append-only, stable columns)
+            self._csv_writer.writerow(row)
+
+    def flush(self) -> None:
+        with self._lock:
+            self._jsonl_f.flush()
+            self._csv_f.flush()
+
+    def close(self) -> None:
+        with self._lock:
+            self._jsonl_f.close()
+            self._csv_f.close()
+
+    def __enter__(self) -> "RunLogger":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.close()
@@ -1,13 +1,15 @@
 from __future__ import annotations
 
-import json
+import functools
 from dataclasses import dataclass
 from datetime import datetime, timezone
 from pathlib import Path
-from typing import Any, Dict, List, Optional, Tuple
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Set, Tuple
 
+import numpy as np
 from jinja2 import Environment, FileSystemLoader, PackageLoader, ChoiceLoader, select_autoescape
 
+from mtap.common.fastjson import loads
 from mtap.reporting.logger import LOG_SCHEMA_VERSION
 
 
@@ -15,14 +17,17 @@ def _utc_now_iso() -> str:
     return datetime.now(timezone.utc).isoformat()
 
 
-def _quantile(values: List[int], q: float) -> int:
+def _quantiles(values: List[int], qs: Sequence[float]) -> List[int]:
     if not values:
-        return 0
-    xs = sorted(values)
-    # nearest-rank method
-    idx = int(round((len(xs) - 1) * q))
-    idx = max(0, min(len(xs) - 1, idx))
-    return int(xs[idx])
+        return [0] * len(qs)
+    # nearest-rank method: "nearest" picks index round((n - 1) * q), ties to even as round() does;
+    # all quantiles from one numpy selection instead of a full sort per quantile
+    arr = np.asarray(values, dtype=np.int64)
+    return [int(x) for x in np.percentile(arr, [q * 100.0 for q in qs], method="nearest")]
+
+
+def _quantile(values: List[int], q: float) -> int:
+    return _quantiles(values, (q,))[0]
 
 
 @dataclass(frozen=True)
@@ -46,28 +51,39 @@ def default_paths(run_dir: Path) -> ReportPaths:
     )
 
 
-def _read_jsonl(path: Path) -> List[Dict[str, Any]]:
-    rows: List[Dict[str, Any]] = []
+def _iter_jsonl(path: Path) -> Iterator[Dict[str, Any]]:
     if not path.exists():
-        return rows
+        return
+    # lines go straight to the decoder (it accepts the trailing newline); blank lines skipped
     with path.open("r", encoding="utf-8") as f:
         for line in f:
-            line = line.strip()
-            if not line:
-                continue
-            rows.append(json.loads(line))
-    return rows
+            if not line.isspace():
+                yield loads(line)
+
+
+@functools.lru_cache(maxsize=8)
+def _jinja_env(template_dir: Optional[str], local_templates: Optional[str]) -> Environment:
+    # One Environment per template location: Jinja keeps compiled templates (re-checked by
+    # mtime), so later reports skip the loader probing and template parsing.
+    loaders = []
+    if template_dir is not None:
+        loaders.append(FileSystemLoader(template_dir))
+    else:
+        # Prefer repo-local templates when running from a working tree, but fall back
+        # to packaged templates for clean installs.
+        loaders.append(FileSystemLoader(local_templates))
+        loaders.append(PackageLoader("mtap", "templates"))
+    return Environment(loader=ChoiceLoader(loaders), autoescape=select_autoescape(["html", "xml"]))
 
 
 def _load_summary(path: Path) -> Dict[str, Any]:
-    return json.loads(path.read_text(encoding="utf-8")) if path.exists() else {}
+    return loads(path.read_bytes()) if path.exists() else {}
 
 
 def generate_report(run_dir: Path, *, template_dir: Optional[Path] = None) -> Path:
     paths = default_paths(run_dir)
     run_dir.mkdir(parents=True, exist_ok=True)
 
-    events = _read_jsonl(paths.events_jsonl)
     summary = _load_summary(paths.summary_json)
 
     run_id = str(summary.get("run_id", run_dir.name))
@@ -95,21 +111,38 @@ def generate_report(run_dir: Path, *, template_dir: Optional[Path] = None) -> Pa
     overall_passed = bool(summary.get("overall_passed", False))
     sn_count = len(sn_rows)
 
-    # Failure summary table: one row per failing step, with attempt count aggregated from events
+    # Only failing (sn, step) pairs show up in the failure summary table
+    failing_keys: Set[Tuple[str, str]] = {
+        (row["sn"], str(f.get("step_id", "")))
+        for row in sn_rows
+        if not row["passed"]
+        for f in row["failures"]
+    }
+
+    # One streaming pass over the events (no list of rows kept):
+    # - per failing (sn, step): attempt count + last message/code/cmd, for the failure summary table
+    # - per step: durations across all attempts, for the duration stats
     attempt_count: Dict[Tuple[str, str], int] = {}
     last_message: Dict[Tuple[str, str], str] = {}
     last_code: Dict[Tuple[str, str], Optional[str]] = {}
     last_cmd: Dict[Tuple[str, str], str] = {}
-    for ev in events:
-        sn = str(ev.get("sn", ""))
+    durations: Dict[str, List[int]] = {}
+    for ev in _iter_jsonl(paths.events_jsonl):
         step = str(ev.get("test_step", ""))
-        key = (sn, step)
+        d = int(ev.get("duration_ms", 0) or 0)
+        durations.setdefault(step, []).append(d)
+        if not failing_keys:
+            continue
+        key = (str(ev.get("sn", "")), step)
+        if key not in failing_keys:
+            continue
         attempt = int(ev.get("attempt", 1) or 1)
         attempt_count[key] = max(attempt_count.get(key, 0), attempt)
         last_message[key] = str(ev.get("message", "") or "")
         last_code[key] = ev.get("error_code", None)
         last_cmd[key] = str(ev.get("command", "") or "")
 
+    # Failure summary table: one row per failing step
     fail_rows = []
     for row in sn_rows:
         if row["passed"]:
@@ -131,33 +164,23 @@ def generate_report(run_dir: Path, *, template_dir: Optional[Path] = None) -> Pa
     fail_rows.sort(key=lambda x: (x["sn"], x["step_id"], x["error_code"]))
 
     # Duration stats per step (across all attempts)
-    durations: Dict[str, List[int]] = {}
-    for ev in events:
-        step = str(ev.get("test_step", ""))
-        d = int(ev.get("duration_ms", 0) or 0)
-        durations.setdefault(step, []).append(d)
-
     duration_rows = []
     for step in sorted(durations.keys()):
         xs = durations[step]
+        p50, p95 = _quantiles(xs, (0.50, 0.95))
         duration_rows.append(
             {
                 "test_step": step,
                 "count": len(xs),
-                "p50": _quantile(xs, 0.50),
-                "p95": _quantile(xs, 0.95),
+                "p50": p50,
+                "p95": p95,
             }
         )
 
-    loaders = []
     if template_dir is not None:
-        loaders.append(FileSystemLoader(str(template_dir)))
+        env = _jinja_env(str(template_dir), None)
     else:
-        # Prefer repo-local templates when running from a working tree, but fall back
-        # to packaged templates for clean installs.
-        loaders.append(FileSystemLoader(str(Path("templates"))))
-        loaders.append(PackageLoader("mtap", "templates"))
-    env = Environment(loader=ChoiceLoader(loaders), autoescape=select_autoescape(["html", "xml"]))
+        env = _jinja_env(None, str(Path("templates").resolve()))
     tpl = env.get_template("report.html")
 
     html = tpl.render(
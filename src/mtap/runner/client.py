@@ -1,12 +1,23 @@
 from __future__ import annotations
 
 import json
+import select
 import socket
 from dataclasses import dataclass
-from typing import Any, Dict, Optional
+from typing import Any, Dict, Optional, Union
 
+from mtap.common.fastjson import loads
 from mtap.dut.protocol import E_TIMEOUT
 
+_RECV_BUFSIZE = 65536
+
+
+def _encode_line(line: Union[str, bytes]) -> bytes:
+    if isinstance(line, bytes):
+        return line if line.endswith(b"\n") else line + b"\n"
+    # str.encode has an ASCII fast path; protocol commands never pay for a real UTF-8 encode
+    return line.rstrip("\n").encode("utf-8") + b"\n"
+
 
 @dataclass(frozen=True)
 class ClientResult:
@@ -18,29 +29,101 @@ class ClientResult:
 
 
 class DutClient:
+    """Line-oriented DUT client over one persistent TCP connection.
+
+    The connection is opened lazily and dropped on any error or timeout (so a late
+    reply can never be read as the answer to a later command); the next call reconnects.
+    """
+
     def __init__(self, host: str, port: int, timeout_s: float) -> None:
         self.host = host
         self.port = port
         self.timeout_s = timeout_s
+        self._sock: Optional[socket.socket] = None
+        self._rbuf = bytearray()
+        # recv_into target, reused across reads (no per-recv bytes object)
+        self._scratch = bytearray(_RECV_BUFSIZE)
+        self._scratch_mv = memoryview(self._scratch)
+
+    def _connect(self, timeout_s: float) -> socket.socket:
+        sock = socket.create_connection((self.host, self.port), timeout=timeout_s)
+        try:
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        except OSError:
+            pass
+        self._sock = sock
+        self._rbuf.clear()
+        return sock
+
+    def _is_stale(self, sock: socket.socket) -> bool:
+        # Idle connection readable => peer closed it (e.g. DUT restarted) or sent unsolicited data
+        try:
+            readable, _, _ = select.select([sock], [], [], 0)
+        except (OSError, ValueError):
+            return True
+        return bool(readable)
+
+    def close(self) -> None:
+        if self._sock is not None:
+            try:
+                self._sock.close()
+            except OSError:
+                pass
+            self._sock = None
+        self._rbuf.clear()
+
+    def __enter__(self) -> "DutClient":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.close()
+
+    def _send_recv_line(self, line: Union[str, bytes], *, timeout_s: float) -> Dict[str, Any]:
+        payload = _encode_line(line)
+        sock = self._sock
+        if sock is not None and self._is_stale(sock):
+            self.close()
+            sock = None
+        try:
+            if sock is not None:
+                sock.settimeout(timeout_s)
+                try:
+                    sock.sendall(payload)
+                except (BrokenPipeError, ConnectionResetError):
+                    # Reused connection was reset before the whole line (newline last) went out:
+                    # the DUT cannot have executed it, so send once more on a fresh connection.
+                    self.close()
+                    sock = None
+            if sock is None:
+                sock = self._connect(timeout_s)
+                sock.settimeout(timeout_s)
+                sock.sendall(payload)
+            # No retry from here on: the command may already have run on the DUT
+            return self._recv_line(sock)
+        except BaseException:
+            self.close()
+            raise
+
+    def _recv_line(self, sock: socket.socket) -> Dict[str, Any]:
+        buf = self._rbuf
+        mv = self._scratch_mv
+        i = buf.find(b"\n")
+        while i < 0:
+            n = sock.recv_into(mv)
+            if not n:
+                # Peer closed without a full line -> treat as no-response.
+                raise TimeoutError("No complete response line from DUT")
+            start = len(buf)
+            buf += mv[:n]
+            # only the new bytes can hold the terminator
+            i = buf.find(b"\n", start)
+        lineb = bytes(buf[:i])
+        del buf[: i + 1]
+        return loads(lineb)
 
-    def _send_recv_line(self, line: str, *, timeout_s: float) -> Dict[str, Any]:
-        payload = (line.rstrip("\n") + "\n").encode("utf-8")
-        with socket.create_connection((self.host, self.port), timeout=timeout_s) as sock:
-            sock.settimeout(timeout_s)
-            sock.sendall(payload)
-            buf = b""
-            while b"\n" not in buf:
-                chunk = sock.recv(4096)
-                if not chunk:
-                    # Peer closed without a full line -> treat as no-response.
-                    break
-                buf += chunk
-        if not buf or b"\n" not in buf:
-            raise TimeoutError("No complete response line from DUT")
-        lineb = buf.split(b"\n", 1)[0]
-        return json.loads(lineb.decode("utf-8"))
-
-    def call_line(self, line: str, *, timeout_s: Optional[float] = None) -> ClientResult:
+    def call_line(
+        self, line: Union[str, bytes], *, timeout_s: Optional[float] = None
+    ) -> ClientResult:
         t = float(timeout_s) if timeout_s is not None else float(self.timeout_s)
         try:
             raw = self._send_recv_line(line, timeout_s=t)
@@ -1,12 +1,13 @@
 from __future__ import annotations
 
+import functools
 from dataclasses import dataclass
 from pathlib import Path
 from typing import Any, Dict, List, Optional
 
-import yaml
 from pydantic import ValidationError
 
+from mtap.common.fastyaml import safe_load
 from mtap.runner.plan_schema import Stage, TestPlan
 
 
@@ -47,17 +48,32 @@ class StepSpec:
 
 
 
+@functools.lru_cache(maxsize=32)
+def _load_plan_raw_cached(path_str: str, mtime_ns: int) -> TestPlan:
+    # keyed by mtime too, so an edited plan is re-read
+    raw: Dict[str, Any] = safe_load(Path(path_str).read_bytes()) or {}
+    try:
+        return TestPlan.model_validate(raw)
+    except ValidationError as e:
+        # Re-raise with a cleaner message for CLI usage
+        raise ValueError(f"Invalid test plan YAML: {path_str}\n{e}") from e
+
+
+@functools.lru_cache(maxsize=32)
+def _load_plan_cached(path_str: str, mtime_ns: int, stage: str) -> Plan:
+    return apply_stage_gating(_load_plan_raw_cached(path_str, mtime_ns), stage=stage or None)
+
+
 def load_plan_raw(plan_path: Path) -> TestPlan:
     """Load + validate plan YAML but do NOT apply stage gating.
 
     Used for traceability/coverage generation where we want to reason
     about the full test intent across stages.
+
+    Parsed plans are memoized per process (by path + mtime) and shared: treat them as read-only.
     """
-    raw: Dict[str, Any] = yaml.safe_load(plan_path.read_text(encoding="utf-8")) or {}
-    try:
-        return TestPlan.model_validate(raw)
-    except ValidationError as e:
-        raise ValueError(f"Invalid test plan YAML: {plan_path}\n{e}") from e
+    p = plan_path.resolve()
+    return _load_plan_raw_cached(str(p), p.stat().st_mtime_ns)
 
 
 def load_plan(plan_path: Path, *, stage: Optional[str] = None) -> Plan:
@@ -67,15 +83,18 @@ def load_plan(plan_path: Path, *, stage: Optional[str] = None) -> Plan:
     - Pydantic schema validation (required keys, types, ranges)
     - Unique step IDs
     - Stage gating: only include steps enabled for station.stage
+
+    Memoized like load_plan_raw, per stage; the returned Plan is shared.
     """
-    raw: Dict[str, Any] = yaml.safe_load(plan_path.read_text(encoding="utf-8")) or {}
+    p = plan_path.resolve()
+    return _load_plan_cached(str(p), p.stat().st_mtime_ns, str(stage or ""))
 
-    try:
-        parsed = TestPlan.model_validate(raw)
-    except ValidationError as e:
-        # Re-raise with a cleaner message for CLI usage
-        raise ValueError(f"Invalid test plan YAML: {plan_path}\n{e}") from e
 
+def apply_stage_gating(parsed: TestPlan, *, stage: Optional[str] = None) -> Plan:
+    """Build the runnable Plan from an already-validated TestPlan (see load_plan).
+
+    Lets callers that also need the ungated plan parse the YAML only once.
+    """
     effective_stage: Stage
     if stage is None or str(stage).strip() == "":
         effective_stage = parsed.station.stage
@@ -1,17 +1,20 @@
 from __future__ import annotations
 
+import threading
 import time
 import importlib.resources as importlib_resources
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
 from pathlib import Path
 from typing import Any, Dict, List, Optional, Tuple
 
+from mtap.common.fastyaml import safe_load
 from mtap.dut.protocol import E_TIMEOUT
-from mtap.reporting.logger import RunLogger, StepEvent
+from mtap.reporting.logger import LOG_SCHEMA_VERSION, RunLogger, StepEvent, _utc_now_iso
 from mtap.runner.client import DutClient
-from mtap.runner.plan_loader import Plan, StepSpec, load_plan, load_plan_raw
+from mtap.runner.plan_loader import Plan, StepSpec, apply_stage_gating, load_plan_raw
 from mtap.traceability.coverage import (
-    generate_coverage_matrix,
+    generate_coverage_columns,
     load_requirements,
     validate_coverage,
     write_csv,
@@ -65,8 +68,17 @@ class TestRunner:
         stage: str,
         plan_path: Path,
         sqlite_db_path: Optional[Path] = None,
+        concurrency: int = 1,
+        log_raw: bool = True,
     ) -> None:
         self.client = DutClient(host, dut_port, timeout_s_default)
+        # SNs run in parallel across this many worker threads (1 = serial, in SN order)
+        self.concurrency = max(1, int(concurrency))
+        self._tls = threading.local()
+        self._worker_clients: List[DutClient] = []
+        self._worker_clients_lock = threading.Lock()
+        # Events keep the full DUT response under data["raw"]; off roughly halves event size
+        self.log_raw = bool(log_raw)
         self.run_dir = run_dir
         self.logger = RunLogger(run_dir)
         self.batch_id = batch_id
@@ -74,7 +86,11 @@ class TestRunner:
         self.stage = stage
         self.plan_path = plan_path
 
-        self.plan: Plan = load_plan(plan_path, stage=stage)        # Traceability validation + coverage matrix (audit)
+        # Parse + validate the YAML once; the gated plan and the coverage matrix share it
+        raw_plan = load_plan_raw(plan_path)
+        self.plan: Plan = apply_stage_gating(raw_plan, stage=stage)
+
+        # Traceability validation + coverage matrix (audit)
         reqs = None
         reqs_path = Path("traceability/req_traceability.yaml")
         if reqs_path.exists():
@@ -82,20 +98,19 @@ class TestRunner:
         else:
             # clean installs: fall back to packaged defaults
             try:
-                txt = importlib_resources.files("mtap").joinpath("resources/req_traceability.yaml").read_text(encoding="utf-8")
-                # load_requirements expects a Path; parse here with yaml via its internal parser
-                import yaml
-                reqs = (yaml.safe_load(txt) or {}).get("requirements", {})
+                packaged = importlib_resources.files("mtap") / "resources" / "req_traceability.yaml"
+                data = packaged.read_bytes()
+                # load_requirements expects a Path; parse the packaged bytes here
+                reqs = (safe_load(data) or {}).get("requirements", {})
             except Exception:
                 reqs = None
 
         if reqs is not None:
             # Coverage should reason about full plan intent (ungated) to ensure no stage regressions.
-            raw_plan = load_plan_raw(plan_path)
             step_pairs = [(s.id, list(s.req_ids)) for s in raw_plan.steps]
             validate_coverage(reqs, step_pairs)
-            rows = generate_coverage_matrix(reqs, step_pairs)
-            write_csv(run_dir / "coverage_matrix.csv", rows)
+            matrix = generate_coverage_columns(reqs, step_pairs)
+            write_csv(run_dir / "coverage_matrix.csv", matrix)
 
         # Optional SQLite store
         self.sqlite = None
@@ -103,10 +118,21 @@ class TestRunner:
             from mtap.storage.sqlite_store import SQLiteStore
             self.sqlite = SQLiteStore(sqlite_db_path)
 
-    def _ping_fw(self, sn: str) -> str:
+    def _worker_client(self) -> DutClient:
+        # One persistent DUT connection per worker thread
+        client = getattr(self._tls, "client", None)
+        if client is None:
+            client = DutClient(self.client.host, self.client.port, self.client.timeout_s)
+            self._tls.client = client
+            with self._worker_clients_lock:
+                self._worker_clients.append(client)
+        return client
+
+    def _ping_fw(self, sn: str, client: Optional[DutClient] = None) -> str:
         """Discover firmware version via PING with transient-error retry."""
+        client = client or self.client
         for attempt in range(1, _PING_RETRIES + 1):
-            res = self.client.call("PING", sn)
+            res = client.call("PING", sn)
             if res.ok:
                 return str(res.data.get("fw", "unknown"))
             # Retry on transient errors (E_BUSY, E_TIMEOUT)
@@ -141,30 +167,38 @@ class TestRunner:
             passed = passed and (float(value) <= float(mx))
         return passed, (None if passed else "LIMIT_FAIL"), measurement, value, units
 
-    def run_step(self, *, run_id: str, sn: str, fw_version: str, step: StepSpec) -> StepAttemptResult:
+    def run_step(
+        self,
+        *,
+        run_id: str,
+        sn: str,
+        fw_version: str,
+        step: StepSpec,
+        client: Optional[DutClient] = None,
+        sqlite_buf: Optional[List[StepEvent]] = None,
+    ) -> StepAttemptResult:
+        client = client or self.client
         cmd = step.cmd
         step_id = step.id
         step_name = step.name
         req_ids = list(step.req_ids or [])
         retries_allowed = int(step.retries)
         backoff_ms = int(step.backoff_ms)
-        timeout_s = float(step.timeout_s or self.client.timeout_s)
-
-        # per-step timeout override (client instance is simple; temporarily override)
-        original_timeout = self.client.timeout_s
-        self.client.timeout_s = timeout_s
+        timeout_s = float(step.timeout_s or client.timeout_s)
 
         last: StepAttemptResult = StepAttemptResult(False, "E_INTERNAL", "Uninitialized", {}, 0)
         for attempt in range(1, retries_allowed + 2):
-            t0 = time.time()
-            res = self.client.call(cmd, sn)
-            dt_ms = int((time.time() - t0) * 1000)
+            t0 = time.perf_counter_ns()
+            # per-step timeout passed per call (the client may be shared; don't mutate it)
+            res = client.call(cmd, sn, timeout_s=timeout_s)
+            # monotonic integer clock: immune to wall-clock (NTP) steps, no float rounding
+            dt_ms = (time.perf_counter_ns() - t0) // 1_000_000
 
             passed = bool(res.ok)
             error_code = res.error_code
             message = res.message
-            data = dict(res.data or {})
-            data["req_ids"] = req_ids
+            # read-only here; req_ids are merged once, into the step result (see below)
+            data = res.data
 
             # Apply limit checks (may convert ok->fail)
             if passed:
@@ -182,7 +216,20 @@ class TestRunner:
             if will_retry:
                 retry_reason = error_code or "UNKNOWN"
 
-            ev = StepEvent.make(
+            ev_data: Dict[str, Any] = {
+                "step_name": step_name,
+                "req_ids": req_ids,
+                "will_retry": will_retry,
+                "retry_reason": retry_reason,
+            }
+            if self.log_raw:
+                ev_data["raw"] = res.raw
+
+            # Direct construction (hot path): skips make()'s extra call, kwargs re-pack and
+            # coercions; every value here already has its field's type.
+            ev = StepEvent(
+                schema_version=LOG_SCHEMA_VERSION,
+                timestamp=_utc_now_iso(),
                 run_id=run_id,
                 batch_id=self.batch_id,
                 station_id=self.station_id,
@@ -192,6 +239,7 @@ class TestRunner:
                 test_step=step_id,
                 command=cmd,
                 attempt=attempt,
+                retry_count=attempt - 1,
                 retries_allowed=retries_allowed,
                 timeout_s=timeout_s,
                 backoff_ms=backoff_ms,
@@ -202,16 +250,12 @@ class TestRunner:
                 value=val,
                 units=units,
                 message=message,
-                data={
-                    "step_name": step_name,
-                    "req_ids": req_ids,
-                    "will_retry": will_retry,
-                    "retry_reason": retry_reason,
-                    "raw": res.raw,
-                },
+                data=ev_data,
             )
             self.logger.log(ev)
-            if self.sqlite is not None:
+            if sqlite_buf is not None:
+                sqlite_buf.append(ev)
+            elif self.sqlite is not None:
                 self.sqlite.append(ev)
 
             last = StepAttemptResult(passed, error_code, message, data, dt_ms)
@@ -224,38 +268,79 @@ class TestRunner:
                 effective_backoff_ms = max(backoff_ms, 100)
                 time.sleep(effective_backoff_ms / 1000.0)
 
-        self.client.timeout_s = original_timeout
-        return last
+        # one copy per step, not per attempt: the result data carries req_ids for traceability
+        data = {**last.data, "req_ids": req_ids}
+        return StepAttemptResult(last.passed, last.error_code, last.message, data, last.duration_ms)
 
-    def run_sn(self, *, run_id: str, sn: str) -> SnSummary:
-        fw = self._ping_fw(sn)
+    def run_sn(self, *, run_id: str, sn: str, client: Optional[DutClient] = None) -> SnSummary:
+        fw = self._ping_fw(sn, client)
         failures: List[Dict[str, Any]] = []
 
+        # SQLite rows for this SN go in as one transaction at the end (local list: worker-safe)
+        sqlite_buf: Optional[List[StepEvent]] = [] if self.sqlite is not None else None
+
         sn_passed = True
-        for step in self.plan.steps:
-            out = self.run_step(run_id=run_id, sn=sn, fw_version=fw, step=step)
-            if not out.passed:
-                sn_passed = False
-                failures.append(
-                    {
-                        "step_id": step.id,
-                        "cmd": step.cmd,
-                        "error_code": out.error_code,
-                        "message": out.message,
-                        "duration_ms": out.duration_ms,
-                        "data": out.data,
-                    }
+        try:
+            for step in self.plan.steps:
+                out = self.run_step(
+                    run_id=run_id,
+                    sn=sn,
+                    fw_version=fw,
+                    step=step,
+                    client=client,
+                    sqlite_buf=sqlite_buf,
                 )
+                if not out.passed:
+                    sn_passed = False
+                    failures.append(
+                        {
+                            "step_id": step.id,
+                            "cmd": step.cmd,
+                            "error_code": out.error_code,
+                            "message": out.message,
+                            "duration_ms": out.duration_ms,
+                            "data": out.data,
+                        }
+                    )
+        finally:
+            try:
+                if sqlite_buf:
+                    self.sqlite.append_many(sqlite_buf)
+            finally:
+                # this SN's rows are on disk once run_sn returns (a crash loses at most one SN)
+                self.logger.flush()
 
         return SnSummary(sn=sn, fw_version=fw, passed=sn_passed, failures=failures)
 
+    def _run_sn_worker(self, run_id: str, sn: str) -> SnSummary:
+        return self.run_sn(run_id=run_id, sn=sn, client=self._worker_client())
+
     def run_batch(self, *, run_id: str, sns: List[str]) -> RunSummary:
         per_sn: Dict[str, SnSummary] = {}
         overall = True
-        for sn in sns:
-            s = self.run_sn(run_id=run_id, sn=sn)
-            per_sn[sn] = s
-            overall = overall and s.passed
+        workers = min(self.concurrency, len(sns))
+        try:
+            if workers <= 1:
+                for sn in sns:
+                    s = self.run_sn(run_id=run_id, sn=sn)
+                    per_sn[sn] = s
+                    overall = overall and s.passed
+            else:
+                # Overlap DUT round-trips across SNs (one connection per worker); SN order kept
+                with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="mtap-sn") as pool:
+                    results = pool.map(lambda sn: self._run_sn_worker(run_id, sn), sns)
+                    for sn, s in zip(sns, results, strict=True):
+                        per_sn[sn] = s
+                        overall = overall and s.passed
+        finally:
+            # the pool's threads are gone, so are their connections; the runner stays usable
+            with self._worker_clients_lock:
+                for c in self._worker_clients:
+                    c.close()
+                self._worker_clients.clear()
+            self.logger.flush()
+            if self.sqlite is not None:
+                self.sqlite.flush()
 
         return RunSummary(
             run_id=run_id,
@@ -265,3 +350,18 @@ class TestRunner:
             overall_passed=overall,
             per_sn=per_sn,
         )
+
+    def close(self) -> None:
+        """Release the DUT connection, the run logs and the SQLite store."""
+        try:
+            self.client.close()
+            self.logger.close()
+        finally:
+            if self.sqlite is not None:
+                self.sqlite.close()
+
+    def __enter__(self) -> "TestRunner":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.close()
@@ -1,94 +1,273 @@
 from __future__ import annotations
 
-import json
+import itertools
 import sqlite3
+import threading
 from pathlib import Path
-from typing import Any, Dict, Iterable, Optional
+from typing import Any, Dict, Iterable, List, Literal, Optional
 
+from mtap.common.fastjson import dumps_bytes
 from mtap.reporting.logger import CSV_COLUMNS, StepEvent
 
 
 SCHEMA_VERSION = 1
 
 
+_CREATE_SQL = """
+    CREATE TABLE IF NOT EXISTS step_events (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        schema_version INTEGER NOT NULL,
+        timestamp TEXT NOT NULL,
+        run_id TEXT NOT NULL,
+        batch_id TEXT NOT NULL,
+        station_id TEXT NOT NULL,
+        stage TEXT NOT NULL,
+        sn TEXT NOT NULL,
+        fw_version TEXT NOT NULL,
+        test_step TEXT NOT NULL,
+        command TEXT NOT NULL,
+        attempt INTEGER NOT NULL,
+        retry_count INTEGER NOT NULL,
+        retries_allowed INTEGER NOT NULL,
+        timeout_s REAL NOT NULL,
+        backoff_ms INTEGER NOT NULL,
+        duration_ms INTEGER NOT NULL,
+        passed INTEGER NOT NULL,
+        error_code TEXT,
+        measurement TEXT,
+        value_json TEXT,
+        units TEXT,
+        message TEXT,
+        data_json TEXT
+    );
+"""
+
+# (run_id, sn, test_step) also serves run_id-only lookups, so no separate run_id index
+_INDEX_SQL = (
+    "CREATE INDEX IF NOT EXISTS idx_run_sn_step ON step_events(run_id, sn, test_step);",
+    "CREATE INDEX IF NOT EXISTS idx_sn ON step_events(sn);",
+)
+
+# idx_run_id: single-column index created by older versions of this store
+_DROP_INDEX_SQL = (
+    "DROP INDEX IF EXISTS idx_run_id;",
+    "DROP INDEX IF EXISTS idx_run_sn_step;",
+    "DROP INDEX IF EXISTS idx_sn;",
+)
+
+# step_events columns written per event (id is autoincrement)
+_ROW_COLS = (
+    "schema_version", "timestamp", "run_id", "batch_id", "station_id", "stage", "sn", "fw_version",
+    "test_step", "command", "attempt", "retry_count", "retries_allowed", "timeout_s", "backoff_ms",
+    "duration_ms",
+    "passed", "error_code", "measurement", "value_json", "units", "message", "data_json",
+)
+
+_ROW_PLACEHOLDERS = f"({','.join('?' * len(_ROW_COLS))})"
+_INSERT_SQL = f"INSERT INTO step_events ({','.join(_ROW_COLS)}) VALUES {_ROW_PLACEHOLDERS}"
+
+# Rows per multi-VALUES INSERT (further capped by the connection's bound-variable limit)
+_MAX_ROWS_PER_INSERT = 128
+
+
+def _multi_insert_sql(n_rows: int) -> str:
+    values = ",".join([_ROW_PLACEHOLDERS] * n_rows)
+    return f"INSERT INTO step_events ({','.join(_ROW_COLS)}) VALUES {values}"
+
+
+def _json_text(obj: Any) -> str:
+    # Same compact encoding as the JSONL log (orjson when installed); None is the common value
+    if obj is None:
+        return "null"
+    return dumps_bytes(obj).decode("utf-8")
+
+
+def _ev_to_row(ev: StepEvent) -> tuple:
+    return (
+        ev.schema_version,
+        ev.timestamp,
+        ev.run_id,
+        ev.batch_id,
+        ev.station_id,
+        ev.stage,
+        ev.sn,
+        ev.fw_version,
+        ev.test_step,
+        ev.command,
+        ev.attempt,
+        ev.retry_count,
+        ev.retries_allowed,
+        ev.timeout_s,
+        ev.backoff_ms,
+        ev.duration_ms,
+        1 if ev.passed else 0,
+        ev.error_code,
+        ev.measurement,
+        _json_text(ev.value),
+        ev.units,
+        ev.message,
+        _json_text(ev.data),
+    )
+
+
 class SQLiteStore:
-    """Optional append-only event store for replay and querying."""
+    """Optional append-only event store for replay and querying.
+
+    One connection per store (WAL journal, so readers don't block the writer).
+    append_many() writes a batch in a single transaction, i.e. one commit per batch;
+    append() queues rows and commits every batch_size of them, so call flush() or
+    close() (or use the store as a context manager) to write the remainder.
 
-    def __init__(self, db_path: Path) -> None:
+    durability="fast" is for regenerable data (tests, replays/bulk loads): no fsync,
+    in-memory journal, exclusive lock, and one long transaction committed only on
+    flush()/close(). A crash can lose or corrupt the database.
+    """
+
+    def __init__(
+        self, db_path: Path, *, batch_size: int = 1000, durability: Literal["safe", "fast"] = "safe"
+    ) -> None:
+        if durability not in ("safe", "fast"):
+            raise ValueError(f"Invalid durability: {durability}. Expected 'safe' or 'fast'")
         self.db_path = db_path
+        self.batch_size = max(1, int(batch_size))
+        self.durability = durability
+        self._buf: List[tuple] = []
+        self._closed = False
         self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        # shared by runner worker threads; every use goes through self._lock
+        # autocommit mode: write transactions are explicit BEGIN/COMMIT (see _write_locked)
+        self._con = sqlite3.connect(self.db_path, isolation_level=None, check_same_thread=False)
+        self._lock = threading.Lock()
+        if durability == "fast":
+            self._con.execute("PRAGMA journal_mode=MEMORY;")
+            self._con.execute("PRAGMA synchronous=OFF;")
+            self._con.execute("PRAGMA locking_mode=EXCLUSIVE;")
+        else:
+            self._con.execute("PRAGMA journal_mode=WAL;")
+            self._con.execute("PRAGMA synchronous=NORMAL;")
+        self._con.execute("PRAGMA temp_store=MEMORY;")
+        self._con.execute("PRAGMA cache_size=-65536;")  # 64 MiB page cache
+        # one cursor for every statement (con.execute/executemany would create one per call)
+        self._cur = self._con.cursor()
+        # Full chunks go in as one multi-row INSERT (one statement step per chunk, not per row)
+        max_vars = self._con.getlimit(sqlite3.SQLITE_LIMIT_VARIABLE_NUMBER)
+        self._rows_per_insert = max(1, min(_MAX_ROWS_PER_INSERT, max_vars // len(_ROW_COLS)))
+        self._multi_sql = _multi_insert_sql(self._rows_per_insert)
         self._init_db()
 
     def _init_db(self) -> None:
-        with sqlite3.connect(self.db_path) as con:
-            con.execute(
-                """
-                CREATE TABLE IF NOT EXISTS step_events (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    schema_version INTEGER NOT NULL,
-                    timestamp TEXT NOT NULL,
-                    run_id TEXT NOT NULL,
-                    batch_id TEXT NOT NULL,
-                    station_id TEXT NOT NULL,
-                    stage TEXT NOT NULL,
-                    sn TEXT NOT NULL,
-                    fw_version TEXT NOT NULL,
-                    test_step TEXT NOT NULL,
-                    command TEXT NOT NULL,
-                    attempt INTEGER NOT NULL,
-                    retry_count INTEGER NOT NULL,
-                    retries_allowed INTEGER NOT NULL,
-                    timeout_s REAL NOT NULL,
-                    backoff_ms INTEGER NOT NULL,
-                    duration_ms INTEGER NOT NULL,
-                    passed INTEGER NOT NULL,
-                    error_code TEXT,
-                    measurement TEXT,
-                    value_json TEXT,
-                    units TEXT,
-                    message TEXT,
-                    data_json TEXT
-                );
-                """
-            )
-            con.execute("CREATE INDEX IF NOT EXISTS idx_run_id ON step_events(run_id);")
-            con.execute("CREATE INDEX IF NOT EXISTS idx_sn ON step_events(sn);")
-            con.commit()
+        with self._lock:
+            cur = self._cur
+            cur.execute(_CREATE_SQL)
+            for sql in _INDEX_SQL:
+                cur.execute(sql)
+
+    def begin_bulk_load(self) -> None:
+        """Drop the indexes so a large import doesn't maintain them row by row.
+
+        Call end_bulk_load() afterwards to rebuild them in one pass. Only worth it when
+        the load is large compared to what the database already holds.
+        """
+        with self._lock:
+            for sql in _DROP_INDEX_SQL:
+                self._cur.execute(sql)
+
+    def end_bulk_load(self) -> None:
+        """Write any queued rows, then (re)create the indexes."""
+        with self._lock:
+            self._write_locked(())
+            for sql in _INDEX_SQL:
+                self._cur.execute(sql)
 
     def append(self, ev: StepEvent) -> None:
-        with sqlite3.connect(self.db_path) as con:
-            con.execute(
-                """
-                INSERT INTO step_events (
-                    schema_version,timestamp,run_id,batch_id,station_id,stage,sn,fw_version,
-                    test_step,command,attempt,retry_count,retries_allowed,timeout_s,backoff_ms,duration_ms,
-                    passed,error_code,measurement,value_json,units,message,data_json
-                ) VALUES (?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?)
-                """,
-                (
-                    ev.schema_version,
-                    ev.timestamp,
-                    ev.run_id,
-                    ev.batch_id,
-                    ev.station_id,
-                    ev.stage,
-                    ev.sn,
-                    ev.fw_version,
-                    ev.test_step,
-                    ev.command,
-                    ev.attempt,
-                    ev.retry_count,
-                    ev.retries_allowed,
-                    ev.timeout_s,
-                    ev.backoff_ms,
-                    ev.duration_ms,
-                    1 if ev.passed else 0,
-                    ev.error_code,
-                    ev.measurement,
-                    json.dumps(ev.value, ensure_ascii=False),
-                    ev.units,
-                    ev.message,
-                    json.dumps(ev.data, ensure_ascii=False),
-                ),
-            )
-            con.commit()
+        """Queue one event; rows are written batch_size at a time (see flush/close)."""
+        row = _ev_to_row(ev)
+        with self._lock:
+            self._buf.append(row)
+            if len(self._buf) >= self.batch_size:
+                self._write_locked(())
+
+    def append_many(self, evs: Iterable[StepEvent]) -> None:
+        """Write events (after any queued ones) in a single transaction.
+
+        Rows are built as they are inserted, a chunk at a time, so memory stays flat
+        however many events are passed.
+        """
+        with self._lock:
+            self._write_locked(map(_ev_to_row, evs))
+
+    def flush(self) -> None:
+        with self._lock:
+            self._write_locked(())
+            self._commit_locked()
+
+    def _write_locked(self, rows: Iterable[tuple]) -> None:
+        queued = self._buf
+        if queued:
+            rows = itertools.chain(queued, rows)
+        else:
+            # peek: an empty batch should not open a transaction
+            rows = iter(rows)
+            first = next(rows, None)
+            if first is None:
+                return
+            rows = itertools.chain((first,), rows)
+        cur = self._cur
+        if self.durability == "fast":
+            # batches are savepoints inside the long transaction (committed by flush/close)
+            if not self._con.in_transaction:
+                cur.execute("BEGIN")
+            cur.execute("SAVEPOINT batch")
+            try:
+                self._insert_rows(rows)
+            except BaseException:
+                # undo this batch only; queued rows stay queued
+                cur.execute("ROLLBACK TO batch")
+                cur.execute("RELEASE batch")
+                raise
+            cur.execute("RELEASE batch")
+        else:
+            cur.execute("BEGIN")
+            try:
+                self._insert_rows(rows)
+            except BaseException:
+                # nothing written; queued rows stay queued
+                cur.execute("ROLLBACK")
+                raise
+            cur.execute("COMMIT")
+        if queued:
+            self._buf = []
+
+    def _insert_rows(self, rows: Iterable[tuple]) -> None:
+        cur = self._cur
+        n = self._rows_per_insert
+        it = iter(rows)
+        while True:
+            chunk = list(itertools.islice(it, n))
+            if len(chunk) < n:
+                # tail (or a small batch): plain per-row statement
+                if chunk:
+                    cur.executemany(_INSERT_SQL, chunk)
+                return
+            cur.execute(self._multi_sql, list(itertools.chain.from_iterable(chunk)))
+
+    def _commit_locked(self) -> None:
+        if self._con.in_transaction:
+            self._cur.execute("COMMIT")
+
+    def close(self) -> None:
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            try:
+                self._write_locked(())
+                self._commit_locked()
+            finally:
+                self._con.close()
+
+    def __enter__(self) -> "SQLiteStore":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.close()
@@ -1,64 +1,117 @@
 from __future__ import annotations
 
+import functools
+from collections import defaultdict
+from dataclasses import dataclass
 from pathlib import Path
-from typing import Dict, List, Iterable, Tuple
+from typing import DefaultDict, Dict, Iterator, List, Iterable, Set, Tuple, Union
 
-import yaml
+from mtap.common.fastyaml import safe_load
 
 
-def load_requirements(path: Path) -> Dict[str, Dict]:
-    d = yaml.safe_load(path.read_text(encoding="utf-8")) or {}
+@functools.lru_cache(maxsize=32)
+def _load_requirements_cached(path_str: str, mtime_ns: int) -> Dict[str, Dict]:
+    # keyed by mtime too, so an edited file is re-read
+    d = safe_load(Path(path_str).read_bytes()) or {}
     return d.get("requirements", {}) or {}
 
 
-def generate_coverage_matrix(requirements: Dict[str, Dict], steps: Iterable[Tuple[str, List[str]]]) -> List[List[str]]:
+def load_requirements(path: Path) -> Dict[str, Dict]:
+    """Parsed `requirements` mapping, memoized per process: treat it as read-only."""
+    p = path.resolve()
+    return _load_requirements_cached(str(p), p.stat().st_mtime_ns)
+
+
+@dataclass(frozen=True)
+class CoverageMatrix:
+    """Coverage rows stored column-wise: four aligned lists, one entry per requirement."""
+
+    req_ids: List[str]
+    titles: List[str]
+    covered: List[str]  # "Y" / "N"
+    mapped_steps: List[str]  # comma-joined step ids
+
+    def __len__(self) -> int:
+        return len(self.req_ids)
+
+    def rows(self) -> Iterator[Tuple[str, str, str, str]]:
+        """Row view: (req_id, title, covered, mapped_steps)."""
+        return zip(self.req_ids, self.titles, self.covered, self.mapped_steps, strict=True)
+
+
+def _index(steps: Iterable[Tuple[str, List[str]]]) -> Tuple[DefaultDict[str, List[str]], Set[str]]:
+    # One pass over (step_id, req_ids): req_id -> mapped steps (plan order), and the covered req_ids
+    req_to_steps: DefaultDict[str, List[str]] = defaultdict(list)
+    for step_id, req_ids in steps:
+        for rid in req_ids:
+            req_to_steps[rid].append(step_id)
+    return req_to_steps, set(req_to_steps)
+
+
+def generate_coverage_columns(
+    requirements: Dict[str, Dict], steps: Iterable[Tuple[str, List[str]]], *, sort: bool = True
+) -> CoverageMatrix:
+    """Column-wise variant of generate_coverage_matrix (what write_csv streams from).
+
+    Args:
+        requirements: {REQ-XXX: {title: ...}}
+        steps: iterable of (step_id, req_ids)
+        sort: rows ordered by req_id (default); False keeps the requirements' own order
+    """
+    req_to_steps, _ = _index(steps)
+
+    req_ids = sorted(requirements) if sort else list(requirements)
+    titles: List[str] = []
+    covered: List[str] = []
+    mapped_steps: List[str] = []
+    for rid in req_ids:
+        titles.append(str(requirements[rid].get("title", "")))
+        mapped = req_to_steps.get(rid)
+        covered.append("Y" if mapped else "N")
+        mapped_steps.append(",".join(mapped) if mapped else "")
+    return CoverageMatrix(
+        req_ids=req_ids, titles=titles, covered=covered, mapped_steps=mapped_steps
+    )
+
+
+def generate_coverage_matrix(
+    requirements: Dict[str, Dict], steps: Iterable[Tuple[str, List[str]]], *, sort: bool = True
+) -> List[List[str]]:
     """Generate coverage rows.
 
     Args:
         requirements: {REQ-XXX: {title: ...}}
         steps: iterable of (step_id, req_ids)
+        sort: rows ordered by req_id (default); False keeps the requirements' own order
 
     Returns rows with columns:
       req_id, title, covered, mapped_steps
     """
-    req_to_steps: Dict[str, List[str]] = {rid: [] for rid in requirements.keys()}
-    for step_id, req_ids in steps:
-        for rid in req_ids:
-            req_to_steps.setdefault(rid, []).append(step_id)
-
-    rows: List[List[str]] = []
-    for rid, info in sorted(requirements.items()):
-        title = str(info.get("title", ""))
-        mapped = req_to_steps.get(rid, [])
-        covered = "Y" if mapped else "N"
-        rows.append([rid, title, covered, ",".join(mapped)])
-    return rows
+    return [list(row) for row in generate_coverage_columns(requirements, steps, sort=sort).rows()]
 
 
 def validate_coverage(requirements: Dict[str, Dict], step_req_pairs: Iterable[Tuple[str, List[str]]]) -> None:
     """Enforce audit-ready traceability constraints."""
-    req_ids = set(requirements.keys())
-    step_pairs = list(step_req_pairs)
+    req_ids = requirements.keys()  # keys view: set operations without copying
+    _, covered = _index(step_req_pairs)
 
     # 1) Every requirement maps to >= 1 step
-    covered = set()
-    for _, rids in step_pairs:
-        covered.update(rids)
-    missing = sorted(req_ids - covered)
+    missing = req_ids - covered
     if missing:
-        raise ValueError(f"Uncovered requirements: {missing}")
+        raise ValueError(f"Uncovered requirements: {sorted(missing)}")
 
     # 2) Every step req_id must exist in requirement set
-    referenced = sorted(set(covered) - req_ids)
+    referenced = covered - req_ids
     if referenced:
-        raise ValueError(f"Plan references unknown requirements: {referenced}")
+        raise ValueError(f"Plan references unknown requirements: {sorted(referenced)}")
 
 
-def write_csv(path: Path, rows: List[List[str]]) -> None:
+def write_csv(path: Path, rows: Union[CoverageMatrix, List[List[str]]]) -> None:
     path.parent.mkdir(parents=True, exist_ok=True)
     import csv
 
-    with path.open("w", newline="", encoding="utf-8") as f:
+    # 1 MiB buffer: large matrices go out in a few big writes; close() does the only flush
+    with path.open("w", newline="", encoding="utf-8", buffering=1 << 20) as f:
         w = csv.writer(f)
         w.writerow(["req_id", "title", "covered", "mapped_steps"])
-        w.writerows(rows)
+        w.writerows(rows.rows() if isinstance(rows, CoverageMatrix) else rows)
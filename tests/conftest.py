@@ -1,8 +1,59 @@
+import socket
 import sys
+import threading
+import time
 from pathlib import Path
 
+import pytest
+
 # Ensure `src/` is importable when running tests without installing the package.
 ROOT = Path(__file__).resolve().parents[1]
 SRC = ROOT / "src"
 if str(SRC) not in sys.path:
     sys.path.insert(0, str(SRC))
+
+
+@pytest.fixture
+def make_event():
+    """Factory for a fully populated StepEvent; keyword args override fields."""
+    from mtap.reporting.logger import StepEvent
+
+    def _make(**kw):
+        base = dict(
+            run_id="R1", batch_id="B1", station_id="ST1", stage="EVT", sn="SN0001",
+            fw_version="1.0.0", test_step="read_temp", command="READ_TEMP", attempt=2,
+            retries_allowed=3, timeout_s=2.0, backoff_ms=200, duration_ms=5, passed=False,
+            error_code="LIMIT_FAIL", measurement="temp_c", value=99.5, units="C", message="OK",
+            data={"raw": {"ok": True}},
+        )
+        base.update(kw)
+        return StepEvent.make(**base)
+
+    return _make
+
+
+@pytest.fixture
+def dut_server(monkeypatch):
+    """In-process DUT simulator on a free local port (packaged config, clean profile)."""
+    from mtap.dut.server import DutServer
+
+    monkeypatch.delenv("MTAP_FAULT_PROFILE", raising=False)
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        port = s.getsockname()[1]
+    config_path = SRC / "mtap" / "resources" / "dut_config.yaml"
+    server = DutServer("127.0.0.1", port, config_path=config_path)
+    t = threading.Thread(target=server.serve_forever, daemon=True)
+    t.start()
+    deadline = time.monotonic() + 5.0
+    while True:
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=0.2).close()
+            break
+        except OSError:
+            if time.monotonic() > deadline:
+                raise
+            time.sleep(0.01)
+    yield server
+    server.stop()
+    t.join(timeout=2.0)
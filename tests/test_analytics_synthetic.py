@@ -3,10 +3,12 @@ from __future__ import annotations
 import json
 from pathlib import Path
 
+import pandas as pd
+
 from mtap.analytics.io import read_events_jsonl
 from mtap.analytics.yield_analysis import compute_yields
-from mtap.analytics.pareto import pareto_failures
-from mtap.analytics.stratification import stratify
+from mtap.analytics.pareto import pareto_failures, pareto_failures_df
+from mtap.analytics.stratification import stratify, stratify_many
 
 
 def _write_jsonl(p: Path, rows: list[dict]) -> None:
@@ -52,3 +54,52 @@ def test_known_small_dataset(tmp_path: Path) -> None:
     # Two FW groups, each with 1 unit, both FTY=1.0
     assert {r.group for r in fw_rows} == {"1.0.0", "1.0.1"}
     assert all(abs(r.fty - 1.0) < 1e-9 for r in fw_rows)
+
+    # single-pass variant agrees with per-key stratify
+    many = stratify_many(rows)
+    assert set(many) == {"fw_version", "stage", "batch_id", "temp_bin"}
+    assert many["fw_version"] == fw_rows
+    assert many["temp_bin"] == stratify(rows, key="temp_bin")
+
+
+def test_null_and_missing_keys_match_str_semantics() -> None:
+    # explicit null is keyed as "None" (a real SN/step); a missing key is "" and dropped
+    events = [
+        {"sn": None, "test_step": "ping", "attempt": 1, "passed": True, "fw_version": None},
+        {"sn": "SN0001", "test_step": None, "attempt": 1, "passed": False, "fw_version": "1.0.0"},
+        {"test_step": "ping", "attempt": 1, "passed": True},
+    ]
+    ys = compute_yields(events)
+    assert ys.total_units == 2
+    assert ys.overall_pass_final == 0
+    assert ys.step_fail_rate_units == {"None": 1.0, "ping": 0.5}
+
+    fw_rows = stratify(events, key="fw_version")
+    assert {r.group for r in fw_rows} == {"None", "1.0.0"}
+
+
+def test_pareto_keeps_null_and_missing_apart() -> None:
+    events = [
+        {"test_step": "ping", "batch_id": "B1", "passed": False, "error_code": None},
+        {"test_step": "ping", "batch_id": "B1", "passed": False},
+        {"test_step": "ping", "batch_id": "B1", "passed": True, "error_code": None},
+    ]
+    pareto = pareto_failures(events)
+    assert pareto["by_error"] == {"None": 1, "": 1}
+    assert pareto["by_step"] == {"ping": 2}
+
+
+def test_pareto_df_matches_pareto_on_null_keys() -> None:
+    # runner events carry every key; failed attempts often have error_code/measurement null
+    events = [
+        {"test_step": "ping", "batch_id": "B1", "passed": False, "error_code": None},
+        {"test_step": "read_temp", "batch_id": "B1", "passed": False, "error_code": "LIMIT_FAIL"},
+        {"test_step": "read_temp", "batch_id": None, "passed": True, "error_code": None},
+    ]
+    expected = pareto_failures(events)
+    assert expected["by_error"] == {"None": 1, "LIMIT_FAIL": 1}
+    df = pd.DataFrame.from_records(events)
+    assert pareto_failures_df(df) == expected
+    # the dashboard stores these columns as category
+    as_category = df.astype({"error_code": "category", "batch_id": "category"})
+    assert pareto_failures_df(as_category) == expected
@@ -0,0 +1,109 @@
+import json
+import socket
+import struct
+import threading
+import time
+
+import pytest
+
+from mtap.runner.client import DutClient
+
+
+class _ScriptedDut:
+    """Tiny line server: `handler(n, line)` returns a reply dict, "reset", or
+    ("close", reply) to answer and then close the connection.
+
+    n counts commands across every connection, so resends are visible.
+    """
+
+    def __init__(self, handler):
+        self.handler = handler
+        self.lines = []
+        self.connections = 0
+        self._lsock = socket.create_server(("127.0.0.1", 0))
+        self._lsock.settimeout(0.2)
+        self.port = self._lsock.getsockname()[1]
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._serve, daemon=True)
+        self._thread.start()
+
+    def _serve(self):
+        while not self._stop.is_set():
+            try:
+                conn, _ = self._lsock.accept()
+            except TimeoutError:
+                continue
+            self.connections += 1
+            with conn:
+                self._serve_conn(conn)
+
+    def _serve_conn(self, conn):
+        buf = b""
+        while not self._stop.is_set():
+            try:
+                chunk = conn.recv(4096)
+            except OSError:
+                return
+            if not chunk:
+                return
+            buf += chunk
+            while b"\n" in buf:
+                line, buf = buf.split(b"\n", 1)
+                self.lines.append(line.decode())
+                action = self.handler(len(self.lines), line.decode())
+                if action == "reset":
+                    # abortive close: the client sees ECONNRESET
+                    conn.setsockopt(socket.SOL_SOCKET, socket.SO_LINGER, struct.pack("ii", 1, 0))
+                    return
+                close = isinstance(action, tuple)
+                if close:
+                    action = action[1]
+                conn.sendall(json.dumps(action).encode() + b"\n")
+                if close:
+                    return
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join(timeout=2.0)
+        self._lsock.close()
+
+
+@pytest.fixture
+def scripted_dut():
+    servers = []
+
+    def _make(handler):
+        srv = _ScriptedDut(handler)
+        servers.append(srv)
+        return srv
+
+    yield _make
+    for srv in servers:
+        srv.stop()
+
+
+def _ok(n):
+    return {"ok": True, "error_code": None, "message": "OK", "data": {"n": n}}
+
+
+def test_reconnects_after_dut_closed_idle_connection(scripted_dut):
+    # DUT answers, then drops the idle connection (e.g. it restarted between commands)
+    srv = scripted_dut(lambda n, line: ("close", _ok(n)) if n == 1 else _ok(n))
+    with DutClient("127.0.0.1", srv.port, 2.0) as client:
+        assert client.call("PING", "SN1").ok
+        time.sleep(0.1)
+        res = client.call("PING", "SN1")
+    assert res.ok and res.data == {"n": 2}
+    assert srv.lines == ["PING SN1", "PING SN1"]
+    assert srv.connections == 2
+
+
+def test_no_resend_after_receive_error(scripted_dut):
+    # second command is read (and may have run) but the DUT resets instead of replying
+    srv = scripted_dut(lambda n, line: "reset" if n == 2 else _ok(n))
+    with DutClient("127.0.0.1", srv.port, 2.0) as client:
+        assert client.call("PING", "SN1").ok
+        res = client.call("SET_TEMP", "SN1", "40")
+        assert not res.ok
+        assert client.call("PING", "SN1").ok
+    assert srv.lines == ["PING SN1", "SET_TEMP SN1 40", "PING SN1"]
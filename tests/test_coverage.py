@@ -0,0 +1,28 @@
+import csv
+
+from mtap.traceability.coverage import (
+    generate_coverage_columns,
+    generate_coverage_matrix,
+    write_csv,
+)
+
+_REQS = {"REQ-002": {"title": "Temp"}, "REQ-001": {"title": "Ping"}, "REQ-003": {"title": "Spare"}}
+_STEPS = [("ping", ["REQ-001"]), ("read_temp", ["REQ-002"]), ("soak", ["REQ-002"])]
+
+
+def test_generate_coverage_matrix_returns_rows():
+    assert generate_coverage_matrix(_REQS, _STEPS) == [
+        ["REQ-001", "Ping", "Y", "ping"],
+        ["REQ-002", "Temp", "Y", "read_temp,soak"],
+        ["REQ-003", "Spare", "N", ""],
+    ]
+
+
+def test_columns_and_rows_write_the_same_csv(tmp_path):
+    write_csv(tmp_path / "rows.csv", generate_coverage_matrix(_REQS, _STEPS))
+    write_csv(tmp_path / "cols.csv", generate_coverage_columns(_REQS, _STEPS))
+    def read(name):
+        with (tmp_path / name).open(newline="") as f:
+            return list(csv.reader(f))
+
+    assert read("rows.csv") == read("cols.csv")
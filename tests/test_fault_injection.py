@@ -1,5 +1,12 @@
+import itertools
 import random
+import time
+from pathlib import Path
+
+import numpy as np
+
 from mtap.dut.fault_injection import FaultInjector
+from mtap.dut.server import DutServer
 
 def _profile(p_fail=0.03):
     return {
@@ -24,13 +31,22 @@ def test_flaky_rate_controlled():
     rng = random.Random(123)
     inj = FaultInjector(rng, _profile(p_fail=0.03))
     n = 4000
-    fails = 0
-    for i in range(n):
-        if inj.should_fail("READ_TEMP", "SN1", cycles=i).should:
-            fails += 1
+    fails = int(inj.should_fail_batch("READ_TEMP", "SN1", np.arange(n)).sum())
     rate = fails / n
     assert 0.02 <= rate <= 0.05
 
+def test_should_fail_batch_matches_sequential_calls():
+    cycles = np.arange(0, 6000, 3)
+    markov = _profile(p_fail=0.05)
+    markov["intermittent_markov"] = {
+        "enabled": True, "p_good_to_bad": 0.05, "p_bad_to_good": 0.2, "fail_p_bad_state": 0.8,
+    }
+    for prof in (_profile(p_fail=0.03), markov):
+        seq = FaultInjector(random.Random(5), prof)
+        batch = FaultInjector(random.Random(5), prof)
+        expected = [seq.should_fail("READ_TEMP", "SN1", cycles=int(c)).should for c in cycles]
+        assert batch.should_fail_batch("READ_TEMP", "SN1", cycles).tolist() == expected
+
 def test_drift_and_burn_in_increase_over_time():
     rng = random.Random(0)
     inj = FaultInjector(rng, _profile(p_fail=0.0))
@@ -62,3 +78,33 @@ def test_markov_bursts_exist():
         else:
             run = 0
     assert max_run >= 3
+
+def test_clean_profile_consumes_rng_like_full_evaluation():
+    # the injector shares its seeded RNG with DeviceModel: skipping the checks must not
+    # shift the stream, or the same --seed gives different measurements
+    slow_delay = _profile(p_fail=0.0)
+    slow_delay["per_command"]["READ_TEMP"] = {"timeout": {"delay_s": [0.5, 1.0]}}
+    for prof in (_profile(p_fail=0.0), slow_delay):
+        fast = FaultInjector(random.Random(0), prof)
+        full = FaultInjector(random.Random(0), prof)
+        assert fast._is_noop
+        full._is_noop = False
+        for i in range(50):
+            for cmd in ("PING", "READ_TEMP", "SELF_TEST"):
+                assert fast.evaluate(cmd, "SN1", cycles=i) == full.evaluate(cmd, "SN1", cycles=i)
+        assert fast._rng.getstate() == full._rng.getstate()
+
+def test_seeded_dut_measurements_do_not_depend_on_fast_path(monkeypatch):
+    monkeypatch.delenv("MTAP_FAULT_PROFILE", raising=False)
+    cfg = Path(__file__).resolve().parents[1] / "src" / "mtap" / "resources" / "dut_config.yaml"
+
+    def measurements(full):
+        srv = DutServer("127.0.0.1", 0, config_path=cfg)
+        if full:
+            srv.faults._is_noop = False
+        clock = itertools.count(1000.0, 7.0)
+        monkeypatch.setattr(time, "time", lambda: next(clock))
+        return [srv._dispatch(f"{cmd} SN{i % 2}".encode())["data"]
+                for i in range(20) for cmd in ("PING", "READ_TEMP", "SELF_TEST")]
+
+    assert measurements(full=False) == measurements(full=True)
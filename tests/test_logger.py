@@ -0,0 +1,24 @@
+import json
+from dataclasses import asdict
+
+from mtap.reporting.logger import CSV_COLUMNS, RunLogger
+
+
+def test_serializers_cover_every_field(make_event):
+    ev = make_event()
+    d = asdict(ev)
+    assert ev.to_csv_tuple() == tuple(d[k] for k in CSV_COLUMNS)
+    assert json.loads(ev.to_jsonl_bytes()) == d
+
+
+def test_run_logger_writes_header_once(tmp_path, make_event):
+    with RunLogger(tmp_path) as log:
+        log.log(make_event())
+    with RunLogger(tmp_path) as log:
+        log.log(make_event(attempt=3))
+    lines = (tmp_path / "events.csv").read_text(encoding="utf-8").splitlines()
+    assert lines[0] == ",".join(CSV_COLUMNS)
+    assert len(lines) == 3
+    jsonl = (tmp_path / "events.jsonl").read_text(encoding="utf-8")
+    events = [json.loads(line) for line in jsonl.splitlines()]
+    assert [e["attempt"] for e in events] == [2, 3]
@@ -1,5 +1,10 @@
+import dataclasses
+import json
+import sqlite3
 from pathlib import Path
+
 from mtap.runner.plan_loader import load_plan
+from mtap.runner.runner import TestRunner as Runner  # alias: keep pytest from collecting it
 
 # Resolve path relative to project root (parent of tests/)
 _PROJECT_ROOT = Path(__file__).resolve().parents[1]
@@ -9,3 +14,69 @@ def test_load_plan():
     plan = load_plan(_PROJECT_ROOT / "test_framework" / "test_plan.yaml")
     assert plan.sn_count >= 1
     assert len(plan.steps) >= 1
+
+
+def _runner(dut_server, tmp_path, **kw):
+    return Runner(
+        host=dut_server.host,
+        dut_port=dut_server.port,
+        timeout_s_default=2.0,
+        run_dir=tmp_path / "run",
+        batch_id="B1",
+        station_id="ST1",
+        stage="EVT",
+        plan_path=_PROJECT_ROOT / "test_framework" / "test_plan.yaml",
+        **kw,
+    )
+
+
+def _jsonl_rows(run_dir):
+    return [json.loads(line) for line in (run_dir / "events.jsonl").read_bytes().splitlines()]
+
+
+def test_run_sn_flushes_events(dut_server, tmp_path):
+    with _runner(dut_server, tmp_path) as runner:
+        s = runner.run_sn(run_id="R1", sn="SN0001")
+        rows = _jsonl_rows(runner.run_dir)
+        assert s.passed
+        assert [r["test_step"] for r in rows] == [st.id for st in runner.plan.steps]
+        csv_lines = (runner.run_dir / "events.csv").read_text(encoding="utf-8").splitlines()
+        assert len(csv_lines) == len(rows) + 1
+
+
+def test_run_batch_twice(dut_server, tmp_path):
+    db = tmp_path / "events.sqlite"
+    with _runner(dut_server, tmp_path, sqlite_db_path=db, concurrency=2) as runner:
+        first = runner.run_batch(run_id="R1", sns=["SN0001", "SN0002"])
+        second = runner.run_batch(run_id="R2", sns=["SN0003"])
+        assert first.overall_passed and second.overall_passed
+        rows = _jsonl_rows(runner.run_dir)
+    runs = {(r["run_id"], r["sn"]) for r in rows}
+    assert runs == {("R1", "SN0001"), ("R1", "SN0002"), ("R2", "SN0003")}
+    con = sqlite3.connect(db)
+    try:
+        assert con.execute("SELECT COUNT(*) FROM step_events").fetchone()[0] == len(rows)
+    finally:
+        con.close()
+
+
+def test_failure_data_keeps_req_ids_and_events_keep_raw(dut_server, tmp_path):
+    with _runner(dut_server, tmp_path) as runner:
+        step = next(s for s in runner.plan.steps if s.limits is not None)
+        # impossible window: every attempt fails its limit check
+        bad = dataclasses.replace(
+            step, retries=0, limits=dataclasses.replace(step.limits, min=1e9, max=None, equals=None)
+        )
+        runner.plan = dataclasses.replace(runner.plan, steps=[bad])
+        s = runner.run_sn(run_id="R1", sn="SN0001")
+        rows = _jsonl_rows(runner.run_dir)
+    assert not s.passed
+    assert s.failures[0]["data"]["req_ids"] == list(step.req_ids)
+    assert rows[-1]["data"]["raw"]["ok"] is True
+
+
+def test_no_log_raw_drops_raw(dut_server, tmp_path):
+    with _runner(dut_server, tmp_path, log_raw=False) as runner:
+        runner.run_sn(run_id="R1", sn="SN0001")
+        rows = _jsonl_rows(runner.run_dir)
+    assert rows and all("raw" not in r["data"] for r in rows)
@@ -0,0 +1,63 @@
+import sqlite3
+
+import pytest
+
+from mtap.storage.sqlite_store import SQLiteStore
+
+
+def _count(db):
+    con = sqlite3.connect(db)
+    try:
+        return con.execute("SELECT COUNT(*) FROM step_events").fetchone()[0]
+    finally:
+        con.close()
+
+
+def test_append_is_batched_until_flush(tmp_path, make_event):
+    db = tmp_path / "events.sqlite"
+    store = SQLiteStore(db, batch_size=3)
+    for _ in range(4):
+        store.append(make_event())
+    assert _count(db) == 3
+
+    store.append_many([make_event(), make_event(attempt=3)])
+    assert _count(db) == 6
+
+    store.append(make_event())
+    store.close()
+    assert _count(db) == 7
+
+
+@pytest.mark.parametrize("durability", ["safe", "fast"])
+def test_failed_batch_keeps_queued_rows(tmp_path, durability, make_event):
+    db = tmp_path / "events.sqlite"
+    with SQLiteStore(db, batch_size=10, durability=durability) as store:
+        store.append(make_event())
+        with pytest.raises(AttributeError):
+            store.append_many([make_event(), object()])
+        store.append_many([make_event()])
+    assert _count(db) == 2
+
+
+def test_bulk_load_rebuilds_indexes(tmp_path, make_event):
+    db = tmp_path / "events.sqlite"
+    with SQLiteStore(db) as store:
+        store.begin_bulk_load()
+        store.append_many(make_event(sn=f"SN{i:04d}") for i in range(50))
+        store.end_bulk_load()
+    con = sqlite3.connect(db)
+    try:
+        names = {row[1] for row in con.execute("PRAGMA index_list(step_events)")}
+    finally:
+        con.close()
+    assert names == {"idx_run_sn_step", "idx_sn"}
+    assert _count(db) == 50
+
+
+def test_close_is_idempotent(tmp_path, make_event):
+    db = tmp_path / "events.sqlite"
+    store = SQLiteStore(db)
+    store.append(make_event())
+    store.close()
+    store.close()
+    assert _count(db) == 1